@@ -5,22 +5,90 @@ Analyzes tweets with chunking support.
 Returns: Summary + Flagged tweet indices with reasons.
 """
 
+import asyncio
+import hashlib
+import io
 import os
 import logging
 import json
 import re
+import threading
+import time
+from bisect import bisect_right
 from dataclasses import dataclass, field
+from itertools import accumulate
 from typing import Optional, List, Dict, Any
 
-import google.generativeai as genai
 from dotenv import load_dotenv
 
+# google.generativeai pulls in the full gRPC/protobuf dependency graph
+# (hundreds of ms of import time), so defer it until an analyzer is actually
+# constructed - importers that never call Gemini don't pay for it.
+genai = None
+
+
+def _load_genai():
+    global genai
+    if genai is None:
+        import google.generativeai as _genai
+        genai = _genai
+    return genai
+
+try:
+    # orjson parses the multi-MB responses Gemini returns noticeably faster
+    # than stdlib json; its JSONDecodeError subclasses the stdlib one.
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
 load_dotenv()
 
 logger = logging.getLogger("analyzer")
 
-
-@dataclass
+# Precompiled patterns for response parsing - these run on every Gemini
+# response, so compile once at import instead of per call.
+_JSON_OBJ_RE = re.compile(r'\{[\s\S]*\}')
+_FLAGGED_ARRAY_RE = re.compile(r'"flagged"\s*:\s*\[([\s\S]*?)\]')
+_FLAG_ENTRY_RE = re.compile(r'\{\s*"index"\s*:\s*(\d+)\s*,\s*"reason"\s*:\s*"([^"]*)"')
+_SUMMARY_RE = re.compile(r'"summary"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+class _RequestPacer:
+    """Token-bucket pacer for outbound Gemini requests.
+
+    Keeps a burst of queued jobs from blowing through the RPM quota and
+    triggering a 429 storm. State lives behind a threading.Lock (not an
+    asyncio primitive) so one pacer can be shared across the separate event
+    loops that asyncio.run creates per analyze() call; waiting itself happens
+    with asyncio.sleep so the loop stays free.
+    """
+
+    def __init__(self, rpm: int):
+        self._rate = rpm / 60.0
+        self._capacity = float(max(1, rpm // 6))  # Allow short bursts (~10s worth)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take one token, returning how long to wait before proceeding."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            self._tokens -= 1.0
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self._rate
+
+    async def acquire(self) -> None:
+        wait = self._reserve()
+        if wait > 0:
+            logger.info("Rate limit pacing: waiting %.1fs before Gemini call", wait)
+            await asyncio.sleep(wait)
+
+
+@dataclass(slots=True)
 class AnalysisResult:
     """Result of Gemini analysis."""
     summary: str
@@ -38,6 +106,46 @@ class GeminiAnalyzer:
 
     MAX_TOKENS_PER_CHUNK = 750_000
     CHARS_PER_TOKEN = 4
+    MAX_CONCURRENT_CHUNKS = 8  # Cap parallel Gemini calls (per-key rate limit)
+    CACHE_TTL_SECONDS = 86400  # Re-analysis of identical prompts within a day is free
+    PROMPT_VERSION = 2  # Bump when CHUNK_PROMPT/SINGLE_PROMPT change to invalidate cached responses
+    MAX_FLAGS_PER_RESPONSE = 200  # Hard cap on flags accepted from one response
+
+    # Exact-match response cache keyed by prompt hash, shared across instances.
+    # Saves a full Gemini round-trip (and its token cost) on re-analysis.
+    _RESPONSE_CACHE: Dict[str, tuple] = {}  # key -> (expires_at, parsed_dict)
+    _CACHE_LOCK = threading.Lock()
+
+    # GenerativeModel pool shared across instances: each model owns a gRPC
+    # channel, and server paths construct a fresh analyzer per request.
+    _MODEL_CACHE: Dict[tuple, Any] = {}  # (api_key, model_name) -> model
+    _MODEL_LOCK = threading.Lock()
+    _configured_api_key: Optional[str] = None
+
+    # One pacer per process: all analyzers share the API key's RPM budget
+    _PACER = _RequestPacer(int(os.getenv("HYPERDRIVE_GEMINI_RPM", "120")))
+
+    # Output schema enforced by Gemini's constrained decoding. Both chunk and
+    # single analyses return {summary, flagged}; the final-summary call just
+    # leaves flagged empty.
+    RESPONSE_SCHEMA = {
+        "type": "object",
+        "properties": {
+            "summary": {"type": "string"},
+            "flagged": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "index": {"type": "integer"},
+                        "reason": {"type": "string"},
+                    },
+                    "required": ["index", "reason"],
+                },
+            },
+        },
+        "required": ["summary"],
+    }
 
     CHUNK_PROMPT = """You are a forensic analyst examining tweets from @{username}.
 
@@ -128,133 +236,303 @@ TWEETS:
 {tweets}
 """
 
-    def __init__(self, api_key: Optional[str] = None, model: str = "gemini-2.0-flash"):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: str = "gemini-2.0-flash",
+        redis_client: Optional[Any] = None,
+    ):
+        """
+        Args:
+            redis_client: Optional Redis client. When provided, parsed
+                responses are also cached in Redis so cache hits survive
+                restarts and are shared across workers.
+        """
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
         self.model_name = model
-        self._model = None
+        self._redis = redis_client
 
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY not provided")
 
-        genai.configure(api_key=self.api_key)
+        genai = _load_genai()
+
+        # Build the model eagerly: chunks are analyzed from worker threads,
+        # and a lazy check-then-create here would be a double-init race.
+        # Models are pooled by (api_key, model_name) so repeated analyzer
+        # construction reuses the underlying gRPC channel instead of paying
+        # the handshake again; genai.configure only runs when the key changes.
+        key = (self.api_key, self.model_name)
+        with self._MODEL_LOCK:
+            if GeminiAnalyzer._configured_api_key != self.api_key:
+                genai.configure(api_key=self.api_key)
+                GeminiAnalyzer._configured_api_key = self.api_key
+            model = self._MODEL_CACHE.get(key)
+            if model is None:
+                # Force JSON-only output from Gemini with high token limit.
+                # The schema constrains decoding to the exact shape the
+                # parser expects, so the regex fallback almost never runs.
+                model = genai.GenerativeModel(
+                    self.model_name,
+                    generation_config=genai.GenerationConfig(
+                        response_mime_type="application/json",
+                        response_schema=self.RESPONSE_SCHEMA,
+                        max_output_tokens=16384,  # Increase from default ~8K
+                    )
+                )
+                self._MODEL_CACHE[key] = model
+        self._model = model
 
-    def _get_model(self):
-        if self._model is None:
-            # Force JSON-only output from Gemini with high token limit
-            self._model = genai.GenerativeModel(
-                self.model_name,
-                generation_config=genai.GenerationConfig(
-                    response_mime_type="application/json",
-                    max_output_tokens=16384,  # Increase from default ~8K
+    def _cache_key(self, prompt: str) -> str:
+        # Model name and prompt version are part of the key: a prompt edit or
+        # model switch must not serve responses generated under the old setup.
+        material = f"{self.model_name}:{self.PROMPT_VERSION}:{prompt}"
+        return hashlib.blake2b(material.encode(), digest_size=16).hexdigest()
+
+    REDIS_CACHE_PREFIX = "hyperdrive:llmcache:"
+
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a previously parsed response for an identical prompt.
+
+        Checks the in-process dict first, then the Redis tier (if wired up),
+        which survives restarts and is shared across workers. Redis failures
+        degrade to a cache miss - analysis never blocks on the cache.
+        """
+        with self._CACHE_LOCK:
+            entry = self._RESPONSE_CACHE.get(key)
+            if entry is not None:
+                expires_at, parsed = entry
+                if time.time() <= expires_at:
+                    return parsed
+                del self._RESPONSE_CACHE[key]
+
+        if self._redis is not None:
+            try:
+                raw = self._redis.get(self.REDIS_CACHE_PREFIX + key)
+            except Exception as e:
+                logger.warning("Redis cache read failed: %s", e)
+                return None
+            if raw:
+                try:
+                    parsed = _json_loads(raw)
+                except json.JSONDecodeError:
+                    return None
+                # Promote to the local tier for subsequent hits
+                with self._CACHE_LOCK:
+                    self._RESPONSE_CACHE[key] = (time.time() + self.CACHE_TTL_SECONDS, parsed)
+                return parsed
+        return None
+
+    def _cache_put(self, key: str, parsed: Dict[str, Any]) -> None:
+        with self._CACHE_LOCK:
+            self._RESPONSE_CACHE[key] = (time.time() + self.CACHE_TTL_SECONDS, parsed)
+        if self._redis is not None:
+            try:
+                self._redis.setex(
+                    self.REDIS_CACHE_PREFIX + key,
+                    self.CACHE_TTL_SECONDS,
+                    json.dumps(parsed),
                 )
-            )
-        return self._model
+            except Exception as e:
+                logger.warning("Redis cache write failed: %s", e)
+
+    MAX_RETRIES = 3  # Attempts per Gemini call before giving up
+    RETRY_BASE_DELAY = 2.0  # Seconds; doubles per attempt
+
+    async def _generate_text(self, prompt: str) -> str:
+        """Run a Gemini call with streaming and return the concatenated text.
+
+        Uses generate_content_async so the event loop stays free during the
+        round-trip, and streaming so receipt overlaps generation instead of
+        waiting for the complete response before parsing can begin. Transient
+        failures (429s when chunks run concurrently, 5xx blips) are retried
+        with exponential backoff before the error propagates.
+        """
+        last_error: Optional[Exception] = None
+        for attempt in range(self.MAX_RETRIES):
+            if attempt:
+                delay = self.RETRY_BASE_DELAY * (2 ** (attempt - 1))
+                logger.warning(
+                    "Gemini call failed (%s), retrying in %.0fs (attempt %d/%d)",
+                    last_error, delay, attempt + 1, self.MAX_RETRIES,
+                )
+                await asyncio.sleep(delay)
+            try:
+                await self._PACER.acquire()
+                parts = []
+                stream = await self._model.generate_content_async(prompt, stream=True)
+                async for event in stream:
+                    try:
+                        if event.text:
+                            parts.append(event.text)
+                    except ValueError:
+                        # Events carrying only metadata (e.g. safety info) have no text
+                        continue
+                return "".join(parts)
+            except Exception as e:
+                last_error = e
+        raise last_error
 
     def _estimate_tokens(self, text: str) -> int:
         return len(text) // self.CHARS_PER_TOKEN
 
+    def _count_tokens(self, text: str) -> int:
+        """Exact token count from the Gemini tokenizer.
+
+        Falls back to the char heuristic if the count call fails (offline,
+        quota, etc.) so analysis never blocks on it.
+        """
+        try:
+            return self._model.count_tokens(text).total_tokens
+        except Exception as e:
+            logger.warning("count_tokens failed (%s); using char estimate", e)
+            return self._estimate_tokens(text)
+
     def _chunk_tweets(self, indexed_tweets: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
         """Split indexed tweets into chunks that fit within token limits."""
         max_chars = self.MAX_TOKENS_PER_CHUNK * self.CHARS_PER_TOKEN
         
-        # Estimate size of each tweet
-        def estimate_tweet_size(tweet: dict) -> int:
-            return len(str(tweet.get('text', ''))) + 100  # Add overhead for formatting
-        
-        total_size = sum(estimate_tweet_size(t) for t in indexed_tweets)
-        if total_size <= max_chars:
-            return [indexed_tweets]
-        
+        # Estimate all tweet sizes in one pass (+100 covers the index/date
+        # formatting overhead), then binary-search chunk boundaries over the
+        # running totals: each chunk closes in O(log N) and is emitted as a
+        # list slice, with no per-tweet append/compare in a Python loop.
+        sizes = [len(str(t.get('text', ''))) + 100 for t in indexed_tweets]
+        prefix = list(accumulate(sizes))
+
+        # No separate total-size precheck: if everything fits, the walk below
+        # naturally produces a single chunk.
         chunks = []
-        current_chunk = []
-        current_size = 0
-        
+        start = 0
+        n = len(indexed_tweets)
+        while start < n:
+            base = prefix[start - 1] if start else 0
+            end = bisect_right(prefix, base + max_chars)
+            if end == start:
+                end = start + 1  # Single tweet over the limit: give it its own chunk
+            chunks.append(indexed_tweets[start:end])
+            start = end
+
+
+        logger.info("Split %d tweets into %d chunks", len(indexed_tweets), len(chunks))
+        return chunks
+
+    @staticmethod
+    def _dedup_retweets(
+        indexed_tweets: List[Dict[str, Any]]
+    ) -> tuple[List[Dict[str, Any]], Dict[int, List[int]]]:
+        """Collapse retweets with identical text down to one occurrence.
+
+        Returns (unique_tweets, dup_map) where dup_map maps the canonical
+        tweet's index to the indices of its dropped duplicates. Original
+        (non-retweet) tweets are always kept.
+        """
+        unique = []
+        seen: Dict[str, int] = {}
+        dup_map: Dict[int, List[int]] = {}
+
         for tweet in indexed_tweets:
-            tweet_size = estimate_tweet_size(tweet)
-            
-            if current_size + tweet_size > max_chars and current_chunk:
-                chunks.append(current_chunk)
-                current_chunk = [tweet]
-                current_size = tweet_size
+            if not tweet.get('is_retweet', False):
+                unique.append(tweet)
+                continue
+            key = tweet.get('text', '').strip().lower()
+            canonical = seen.get(key)
+            if canonical is None:
+                seen[key] = tweet.get('index', 0)
+                unique.append(tweet)
             else:
-                current_chunk.append(tweet)
-                current_size += tweet_size
-        
-        if current_chunk:
-            chunks.append(current_chunk)
-        
-        logger.info(f"Split {len(indexed_tweets)} tweets into {len(chunks)} chunks")
-        return chunks
+                dup_map.setdefault(canonical, []).append(tweet.get('index', 0))
+
+        return unique, dup_map
+
+    @staticmethod
+    def _expand_duplicate_flags(
+        flagged: List[Dict[str, Any]], dup_map: Dict[int, List[int]]
+    ) -> List[Dict[str, Any]]:
+        """Copy each flag onto the duplicates removed by _dedup_retweets."""
+        if not dup_map:
+            return flagged
+        expanded = list(flagged)
+        for flag in flagged:
+            reason = flag.get("reason", "")
+            for dup_index in dup_map.get(flag.get("index"), ()):
+                expanded.append({"index": dup_index, "reason": reason})
+        return expanded
 
     def _format_tweets_for_prompt(self, indexed_tweets: List[Dict[str, Any]]) -> str:
         """Format indexed tweets for the AI prompt."""
+        # Hot for large accounts: bind append locally and format each line in
+        # a single f-string so the loop does minimal per-tweet work.
         lines = []
+        append = lines.append
         for tweet in indexed_tweets:
-            idx = tweet.get('index', 0)
-            text = tweet.get('text', '')
-            date = tweet.get('date', '')
-            is_rt = tweet.get('is_retweet', False)
-            
-            if is_rt:
-                original_author = tweet.get('original_author', 'unknown')
-                line = f"[INDEX: {idx}] [RETWEET of @{original_author}] [{date}] {text}"
+            get = tweet.get
+            if get('is_retweet', False):
+                append(
+                    f"[INDEX: {get('index', 0)}] "
+                    f"[RETWEET of @{get('original_author') or 'unknown'}] "
+                    f"[{get('date', '')}] {get('text', '')}"
+                )
             else:
-                line = f"[INDEX: {idx}] [{date}] {text}"
-            lines.append(line)
-        
+                append(f"[INDEX: {get('index', 0)}] [{get('date', '')}] {get('text', '')}")
+
         return "\n---\n".join(lines)
 
     def _parse_json_response(self, response_text: str) -> Dict[str, Any]:
         """Parse JSON from AI response, handling common issues."""
         text = response_text.strip()
         
-        # Remove markdown code blocks if present
-        if '```' in text:
-            lines = text.split('\n')
-            json_lines = []
-            in_block = False
-            for line in lines:
-                if line.strip().startswith('```'):
-                    in_block = not in_block
-                    continue
-                if in_block:
-                    json_lines.append(line)
-            if json_lines:
-                text = '\n'.join(json_lines).strip()
+        # Remove markdown code fences if present. Slice between the opening
+        # and closing fence with str.find instead of materializing and
+        # re-joining every line of the response.
+        fence = text.find('```')
+        if fence != -1:
+            body_start = text.find('\n', fence)  # skip the ```json line itself
+            if body_start != -1:
+                body_end = text.find('```', body_start)
+                inner = text[body_start + 1:body_end if body_end != -1 else len(text)].strip()
+                if inner:
+                    text = inner
         
         # Try direct parse
         try:
-            parsed = json.loads(text)
-            logger.info(f"JSON parsed successfully. Keys: {list(parsed.keys())}, flagged count: {len(parsed.get('flagged', []))}")
+            parsed = _json_loads(text)
+            logger.info("JSON parsed successfully. Keys: %s, flagged count: %d", list(parsed.keys()), len(parsed.get('flagged', [])))
+            flagged = parsed.get('flagged')
+            if flagged and len(flagged) > self.MAX_FLAGS_PER_RESPONSE:
+                # The prompts cap flags at 20/50; a response far past that is
+                # the model rambling - don't let it blow up downstream lists.
+                logger.warning("Truncating %d flags to %d", len(flagged), self.MAX_FLAGS_PER_RESPONSE)
+                parsed['flagged'] = flagged[:self.MAX_FLAGS_PER_RESPONSE]
             return parsed
         except json.JSONDecodeError as e:
-            logger.warning(f"Direct JSON parse failed: {e}")
+            logger.warning("Direct JSON parse failed: %s", e)
         
         # Try to find JSON object in text (greedy match)
-        match = re.search(r'\{[\s\S]*\}', text)
+        match = _JSON_OBJ_RE.search(text)
         if match:
             try:
-                return json.loads(match.group())
+                return _json_loads(match.group())
             except json.JSONDecodeError:
                 pass
         
         # Try to extract flagged array separately using regex
         flagged = []
-        flagged_match = re.search(r'"flagged"\s*:\s*\[([\s\S]*?)\]', text)
+        flagged_match = _FLAGGED_ARRAY_RE.search(text)
         if flagged_match:
             # Try to parse individual flag entries
-            flag_pattern = r'\{\s*"index"\s*:\s*(\d+)\s*,\s*"reason"\s*:\s*"([^"]*)"'
-            for m in re.finditer(flag_pattern, flagged_match.group(1)):
+            for m in _FLAG_ENTRY_RE.finditer(flagged_match.group(1)):
                 try:
                     flagged.append({"index": int(m.group(1)), "reason": m.group(2)})
                 except (ValueError, IndexError):
                     continue
+                if len(flagged) == self.MAX_FLAGS_PER_RESPONSE:
+                    break
             if flagged:
-                logger.info(f"Extracted {len(flagged)} flags via regex fallback")
+                logger.info("Extracted %d flags via regex fallback", len(flagged))
         
         # Try to extract summary
         summary = ""
-        summary_match = re.search(r'"summary"\s*:\s*"((?:[^"\\]|\\.)*)"', text)
+        summary_match = _SUMMARY_RE.search(text)
         if summary_match:
             summary = summary_match.group(1)
         else:
@@ -263,18 +541,19 @@ TWEETS:
         
         if not flagged:
             # Log more of the response for debugging
-            logger.warning(f"Failed to parse JSON response, no flags extracted")
-            logger.warning(f"Response start: {text[:500]}")
-            logger.warning(f"Response end: {text[-500:]}")
+            logger.warning("Failed to parse JSON response, no flags extracted")
+            logger.warning("Response start: %s", text[:500])
+            logger.warning("Response end: %s", text[-500:])
         
         return {"summary": summary, "flagged": flagged}
 
-    def _analyze_chunk(
-        self, 
-        chunk_tweets: List[Dict[str, Any]], 
-        username: str, 
-        chunk_num: int, 
-        total_chunks: int
+    async def _analyze_chunk(
+        self,
+        chunk_tweets: List[Dict[str, Any]],
+        username: str,
+        chunk_num: int,
+        total_chunks: int,
+        semaphore: Optional[asyncio.Semaphore] = None,
     ) -> tuple[str, list[dict]]:
         """Analyze a single chunk, return (summary_text, flagged_indices)."""
         formatted_tweets = self._format_tweets_for_prompt(chunk_tweets)
@@ -286,28 +565,63 @@ TWEETS:
             tweets=formatted_tweets,
         )
         
-        logger.info(f"Analyzing chunk {chunk_num}/{total_chunks} ({len(chunk_tweets)} tweets)")
-        
+        logger.info("Analyzing chunk %d/%d (%d tweets)", chunk_num, total_chunks, len(chunk_tweets))
+
+        cache_key = self._cache_key(prompt)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            logger.info("  Chunk %d: cache hit, skipping Gemini call", chunk_num)
+            return cached.get("summary", ""), cached.get("flagged", [])
+
         try:
-            model = self._get_model()
-            response = model.generate_content(prompt)
-            
-            if response.text:
-                parsed = self._parse_json_response(response.text)
+            if semaphore is not None:
+                async with semaphore:
+                    response_text = await self._generate_text(prompt)
+            else:
+                response_text = await self._generate_text(prompt)
+
+            if response_text:
+                parsed = self._parse_json_response(response_text)
                 summary = parsed.get("summary", "")
                 flagged = parsed.get("flagged", [])
-                logger.info(f"  Chunk {chunk_num}: flagged {len(flagged)} tweets")
+                self._cache_put(cache_key, parsed)
+                logger.info("  Chunk %d: flagged %d tweets", chunk_num, len(flagged))
                 return summary, flagged
             else:
                 return f"[Chunk {chunk_num} failed]", []
                 
         except Exception as e:
-            logger.error(f"Error analyzing chunk {chunk_num}: {e}")
+            logger.error("Error analyzing chunk %d: %s", chunk_num, e)
             return f"[Chunk {chunk_num} error: {e}]", []
 
-    def _create_final_summary(self, chunk_summaries: list[str], username: str, total_tweets: int) -> str:
+    SUMMARY_SENTENCES_PER_CHUNK = 3  # Distill chunk summaries before the final call
+
+    @classmethod
+    def _trim_summary(cls, summary: str) -> str:
+        """Keep the first few sentences of a chunk summary.
+
+        The chunk prompt asks for 2-3 sentences but the model sometimes runs
+        long; everything past the lead sentences is redundant for the final
+        report and just inflates its input tokens.
+        """
+        sentences = summary.split('.')
+        if len(sentences) <= cls.SUMMARY_SENTENCES_PER_CHUNK:
+            return summary
+        return '.'.join(sentences[:cls.SUMMARY_SENTENCES_PER_CHUNK]).strip() + '.'
+
+    async def _create_final_summary(self, chunk_summaries: list[str], username: str, total_tweets: int) -> str:
         """Create final summary from chunk summaries."""
-        combined = "\n\n".join([f"Chunk {i+1}: {s}" for i, s in enumerate(chunk_summaries)])
+        # Write straight into one buffer instead of allocating an f-string
+        # per chunk plus an intermediate list before the join.
+        buf = io.StringIO()
+        write = buf.write
+        for i, s in enumerate(chunk_summaries, 1):
+            write("Chunk ")
+            write(str(i))
+            write(": ")
+            write(self._trim_summary(s))
+            write("\n\n")
+        combined = buf.getvalue()
         
         prompt = self.FINAL_SUMMARY_PROMPT.format(
             username=username,
@@ -316,17 +630,16 @@ TWEETS:
             chunk_analyses=combined,
         )
         
-        logger.info(f"Creating final summary from {len(chunk_summaries)} chunk summaries")
+        logger.info("Creating final summary from %d chunk summaries", len(chunk_summaries))
         
         try:
-            model = self._get_model()
-            response = model.generate_content(prompt)
-            if response.text:
-                parsed = self._parse_json_response(response.text)
-                return parsed.get("summary", response.text)
+            response_text = await self._generate_text(prompt)
+            if response_text:
+                parsed = self._parse_json_response(response_text)
+                return parsed.get("summary", response_text)
             return "Unable to generate summary."
         except Exception as e:
-            logger.error(f"Error creating final summary: {e}")
+            logger.error("Error creating final summary: %s", e)
             return f"Summary error: {e}"
 
     def analyze(
@@ -334,6 +647,15 @@ TWEETS:
         indexed_tweets: List[Dict[str, Any]],
         username: str,
         custom_prompt: Optional[str] = None,
+    ) -> AnalysisResult:
+        """Synchronous wrapper around analyze_async for non-async callers."""
+        return asyncio.run(self.analyze_async(indexed_tweets, username, custom_prompt))
+
+    async def analyze_async(
+        self,
+        indexed_tweets: List[Dict[str, Any]],
+        username: str,
+        custom_prompt: Optional[str] = None,
     ) -> AnalysisResult:
         """
         Analyze tweets, return summary + flagged indices.
@@ -357,32 +679,81 @@ TWEETS:
                 error="No content"
             )
 
-        # Estimate tokens for all tweets
-        total_text = " ".join(t.get('text', '') for t in indexed_tweets)
-        estimated_tokens = self._estimate_tokens(total_text)
-        logger.info(f"Analyzing {tweet_count} tweets (~{estimated_tokens:,} tokens)")
+        # Retweet-heavy accounts repeat the same retweet text dozens of
+        # times; send each unique retweet once and fan flags back out to
+        # the duplicates afterwards. The user's own tweets are never
+        # collapsed.
+        unique_tweets, dup_map = self._dedup_retweets(indexed_tweets)
+        if len(unique_tweets) < tweet_count:
+            logger.info("Deduplicated %d repeated retweets", tweet_count - len(unique_tweets))
+
+        # Estimate tokens for all tweets. Sum lengths instead of joining the
+        # text into a throwaway string - same answer, no second copy of the
+        # corpus in memory.
+        total_chars = sum(len(t.get('text', '')) for t in unique_tweets) + len(unique_tweets)
+        estimated_tokens = total_chars // self.CHARS_PER_TOKEN
+
+        # The 4-chars-per-token heuristic can be ~2x off for non-English
+        # tweets, either forcing an unnecessary chunked run (extra Gemini
+        # calls) or blowing the limit mid-request. When the decision is
+        # borderline, get the real count from the tokenizer.
+        # count_tokens is a synchronous RPC on a multi-MB payload, so run it
+        # off the event loop - inline analyses would otherwise stall the
+        # whole server for the duration of the call.
+        if self.MAX_TOKENS_PER_CHUNK // 2 < estimated_tokens < self.MAX_TOKENS_PER_CHUNK * 2:
+            estimated_tokens = await asyncio.to_thread(
+                self._count_tokens, self._format_tweets_for_prompt(unique_tweets)
+            )
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Analyzing %d tweets (~%s tokens)", tweet_count, f"{estimated_tokens:,}")
 
         # Single chunk - direct analysis
         if estimated_tokens <= self.MAX_TOKENS_PER_CHUNK:
             logger.info("Single chunk analysis")
-            return self._analyze_single(indexed_tweets, username, custom_prompt)
-        
+            result = await self._analyze_single(unique_tweets, username, custom_prompt)
+            result.flagged_indices = self._expand_duplicate_flags(result.flagged_indices, dup_map)
+            result.tweet_count = tweet_count
+            return result
+
         # Multi-chunk analysis
-        logger.info(f"Multi-chunk analysis needed")
-        chunks = self._chunk_tweets(indexed_tweets)
+        logger.info("Multi-chunk analysis needed")
+        chunks = self._chunk_tweets(unique_tweets)
         
+        # Chunks are independent, so dispatch them concurrently - the work is
+        # I/O-bound on the Gemini round-trip, so wall time drops from
+        # sum(chunk_latency) to roughly max(chunk_latency). The semaphore
+        # keeps in-flight calls inside the per-key rate limit.
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_CHUNKS)
+        results = await asyncio.gather(*(
+            self._analyze_chunk(chunk, username, i, len(chunks), semaphore)
+            for i, chunk in enumerate(chunks, 1)
+        ))
+
+        # Dedup flags by index while collecting: chunks are disjoint, but the
+        # model occasionally repeats an entry, and duplicate-flag expansion
+        # below can only amplify repeats.
         all_flagged = []
+        seen_indices: set = set()
         chunk_summaries = []
-        
-        for i, chunk in enumerate(chunks, 1):
-            summary, flagged = self._analyze_chunk(chunk, username, i, len(chunks))
+        for summary, flagged in results:
             chunk_summaries.append(summary)
-            all_flagged.extend(flagged)
+            for flag in flagged:
+                idx = flag.get("index")
+                if idx not in seen_indices:
+                    seen_indices.add(idx)
+                    all_flagged.append(flag)
+        all_flagged = self._expand_duplicate_flags(all_flagged, dup_map)
         
-        # Create final summary
-        final_summary = self._create_final_summary(chunk_summaries, username, tweet_count)
+        # Create final summary. For two-chunk runs the dedicated
+        # summarization call adds a full Gemini round-trip to stitch
+        # together two short paragraphs - concatenate locally instead.
+        if len(chunks) <= 2:
+            final_summary = " ".join(s for s in chunk_summaries if s)[:2000]
+        else:
+            final_summary = await self._create_final_summary(chunk_summaries, username, tweet_count)
         
-        logger.info(f"Total flagged tweets across all chunks: {len(all_flagged)}")
+        logger.info("Total flagged tweets across all chunks: %d", len(all_flagged))
         
         return AnalysisResult(
             summary=final_summary,
@@ -393,7 +764,7 @@ TWEETS:
             chunks_processed=len(chunks),
         )
 
-    def _analyze_single(
+    async def _analyze_single(
         self,
         indexed_tweets: List[Dict[str, Any]],
         username: str,
@@ -407,32 +778,44 @@ TWEETS:
             prompt = custom_prompt
             if "{tweets}" not in prompt:
                 prompt += "\n\nTweets:\n{tweets}"
-            prompt = prompt.format(tweets=formatted_tweets)
+            # str.replace instead of .format: user prompts can contain
+            # arbitrary braces that would make .format raise (or swallow them).
+            prompt = prompt.replace("{tweets}", formatted_tweets)
         else:
+            # The class template is format-style (doubled braces around the
+            # JSON example), so it must go through .format - only the
+            # user-supplied prompt above needs the brace-safe replace path.
             prompt = self.SINGLE_PROMPT.format(
                 username=username,
                 tweet_count=tweet_count,
                 tweets=formatted_tweets,
             )
 
+        cache_key = self._cache_key(prompt)
+
         try:
-            model = self._get_model()
-            response = model.generate_content(prompt)
-            
-            if not response.text:
-                return AnalysisResult(
-                    summary="Unable to generate analysis.",
-                    themes=[],
-                    username=username,
-                    tweet_count=tweet_count,
-                    error="Empty response"
-                )
+            parsed = self._cache_get(cache_key)
+            if parsed is not None:
+                logger.info("Single analysis: cache hit, skipping Gemini call")
+            else:
+                response_text = await self._generate_text(prompt)
+
+                if not response_text:
+                    return AnalysisResult(
+                        summary="Unable to generate analysis.",
+                        themes=[],
+                        username=username,
+                        tweet_count=tweet_count,
+                        error="Empty response"
+                    )
+
+                parsed = self._parse_json_response(response_text)
+                self._cache_put(cache_key, parsed)
 
-            parsed = self._parse_json_response(response.text)
             summary = parsed.get("summary", "")
             flagged = parsed.get("flagged", [])
             
-            logger.info(f"Single analysis complete: {len(flagged)} tweets flagged")
+            logger.info("Single analysis complete: %d tweets flagged", len(flagged))
 
             return AnalysisResult(
                 summary=summary,
@@ -443,7 +826,7 @@ TWEETS:
             )
 
         except Exception as e:
-            logger.error(f"Gemini error: {e}")
+            logger.error("Gemini error: %s", e)
             return AnalysisResult(
                 summary="",
                 themes=[],
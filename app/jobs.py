@@ -5,16 +5,30 @@ Handles job creation, status tracking, and results storage.
 """
 
 import json
+import os
+import time
+import zlib
 import uuid
 import logging
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from dataclasses import dataclass, field, asdict
 from enum import Enum
 
 import redis
 from redis import Redis
 
+try:
+    # orjson runs the dumps/loads pair on every job read and write several
+    # times faster than stdlib json; dumps returning bytes suits the binary
+    # state pool. JSONDecodeError subclasses the stdlib one.
+    from orjson import dumps as _json_dumps, loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
 logger = logging.getLogger("jobs")
 
 
@@ -30,7 +44,7 @@ class Platform(str, Enum):
     INSTAGRAM = "instagram"
 
 
-@dataclass
+@dataclass(slots=True)
 class Job:
     """Represents an analysis job."""
     id: str
@@ -45,8 +59,10 @@ class Job:
     include_retweets: bool = True
     include_replies: bool = True
     custom_prompt: Optional[str] = None
+    max_tweets: int = 5000  # Scrape cap for Twitter jobs
     max_posts: int = 50  # For Instagram
-    
+    priority: str = "normal"  # "high" jobs jump the queue
+
     # Progress tracking
     progress: int = 0  # 0-100
     current_step: str = "Queued"
@@ -58,6 +74,7 @@ class Job:
     themes: List[str] = field(default_factory=list)
     highlighted_tweets: List[Dict[str, Any]] = field(default_factory=list)  # Legacy
     all_tweets: List[Dict[str, Any]] = field(default_factory=list)  # New: all tweets with flags
+    total_flagged: int = 0  # Counted once at completion, not per page request
     error: Optional[str] = None
     
     # Timestamps
@@ -67,6 +84,7 @@ class Job:
     
     # Worker info
     worker_id: Optional[str] = None
+    retries: int = 0  # Times this job was requeued after a worker crash
     
     def to_dict(self) -> dict:
         """Convert to dictionary for Redis storage."""
@@ -84,9 +102,21 @@ class Job:
         # Handle missing all_tweets field for backward compatibility
         if 'all_tweets' not in data:
             data['all_tweets'] = []
+        # Handle missing max_tweets field
+        if 'max_tweets' not in data:
+            data['max_tweets'] = 5000
         # Handle missing max_posts field
         if 'max_posts' not in data:
             data['max_posts'] = 50
+        # Handle missing priority field
+        if 'priority' not in data:
+            data['priority'] = "normal"
+        # Handle missing retries field
+        if 'retries' not in data:
+            data['retries'] = 0
+        # Handle missing total_flagged field
+        if 'total_flagged' not in data:
+            data['total_flagged'] = 0
         return cls(**data)
 
 
@@ -96,17 +126,67 @@ class JobQueue:
     JOBS_KEY = "hyperdrive:jobs"  # Hash of all jobs
     QUEUE_KEY = "hyperdrive:queue"  # List of pending job IDs
     WORKERS_KEY = "hyperdrive:workers"  # Hash of active workers
+    CTIME_KEY = "hyperdrive:jobs_by_ctime"  # ZSET job_id -> creation epoch
+    PROGRESS_CHANNEL = "hyperdrive:progress:"  # Pub/Sub channel prefix (+ job id)
+    IN_FLIGHT_KEY = "hyperdrive:inflight"  # List of claimed-but-unfinished job IDs
+    IN_FLIGHT_STARTED_KEY = "hyperdrive:inflight_started"  # ZSET job_id -> claim epoch
+    DLQ_KEY = "hyperdrive:dlq"  # List of job IDs that exhausted their retries
+
+    STALE_JOB_SECONDS = 600  # Requeue in-flight jobs unseen for this long
+    MAX_RETRIES = 3  # Requeue attempts before a job lands in the DLQ
     
     def __init__(self, redis_url: str = "redis://localhost:6379"):
         """
         Initialize the job queue.
-        
+
         Args:
             redis_url: Redis connection URL
         """
-        self.redis = Redis.from_url(redis_url, decode_responses=True)
+        # Separate pools for blocking queue waits vs. job-state traffic: a
+        # BLPOP parks its connection for up to 5s, and sharing a pool with
+        # progress writes would let queue waits starve them.
+        # State pool stays binary (decode_responses=False): job blobs may be
+        # zlib-compressed. The queue pool only ever carries job-id strings.
+        self._state_pool = redis.ConnectionPool.from_url(
+            redis_url,
+            decode_responses=False,
+            max_connections=int(os.getenv("REDIS_STATE_CONNECTIONS", "20")),
+        )
+        self._queue_pool = redis.ConnectionPool.from_url(
+            redis_url,
+            decode_responses=True,
+            max_connections=int(os.getenv("REDIS_QUEUE_CONNECTIONS", "10")),
+        )
+        self.redis = Redis(connection_pool=self._state_pool)
+        self._queue = Redis(connection_pool=self._queue_pool)
+        # Last (progress, step) written per job, used to drop no-op updates
+        self._last_progress: Dict[str, tuple] = {}
         logger.info(f"JobQueue connected to Redis: {redis_url}")
     
+    COMPRESS_MIN_BYTES = 1024  # Blobs below this aren't worth the zlib call
+
+    @classmethod
+    def _encode_job(cls, data: dict) -> bytes:
+        """Serialize a job dict, zlib-compressing text-heavy records.
+
+        The analysis markdown and all_tweets list push completed jobs into
+        the multi-KB range; level-3 zlib cuts those 3-5x for Redis memory and
+        wire bandwidth. Small records are stored as plain JSON.
+        """
+        blob = _json_dumps(data)
+        if len(blob) >= cls.COMPRESS_MIN_BYTES:
+            blob = zlib.compress(blob, 3)
+        return blob
+
+    @staticmethod
+    def _decode_job_blob(raw) -> dict:
+        """Parse a stored job blob, compressed or plain (legacy) JSON."""
+        if isinstance(raw, str):
+            raw = raw.encode()
+        if raw[:1] == b'\x78':  # zlib header; plain JSON starts with '{'
+            raw = zlib.decompress(raw)
+        return _json_loads(raw)
+
     def create_job(
         self,
         username: str,
@@ -117,15 +197,20 @@ class JobQueue:
         include_replies: bool = True,
         custom_prompt: Optional[str] = None,
         platform: str = "twitter",
+        max_tweets: int = 5000,
         max_posts: int = 50,
+        priority: str = "normal",
     ) -> Job:
         """
         Create a new job and add it to the queue.
-        
+
         Args:
             platform: "twitter" or "instagram"
+            max_tweets: Maximum tweets to scrape (Twitter jobs)
             max_posts: Maximum posts to scrape (mainly for Instagram)
-        
+            priority: "normal" appends to the queue; "high" (user is
+                actively waiting) goes to the front
+
         Returns:
             The created Job object
         """
@@ -139,16 +224,22 @@ class JobQueue:
             include_retweets=include_retweets,
             include_replies=include_replies,
             custom_prompt=custom_prompt,
+            max_tweets=max_tweets,
             max_posts=max_posts,
+            priority=priority,
             created_at=datetime.now().isoformat(),
         )
-        
-        # Store job data
-        self.redis.hset(self.JOBS_KEY, job.id, json.dumps(job.to_dict()))
-        
-        # Add to pending queue
-        self.redis.rpush(self.QUEUE_KEY, job.id)
-        
+
+        # Store job data, index by creation time, and enqueue in one round-trip
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hset(self.JOBS_KEY, job.id, self._encode_job(job.to_dict()))
+        pipe.zadd(self.CTIME_KEY, {job.id: time.time()})
+        if priority == "high":
+            pipe.lpush(self.QUEUE_KEY, job.id)
+        else:
+            pipe.rpush(self.QUEUE_KEY, job.id)
+        pipe.execute()
+
         logger.info(f"Created job {job.id} for @{username}")
         return job
     
@@ -157,11 +248,11 @@ class JobQueue:
         data = self.redis.hget(self.JOBS_KEY, job_id)
         if not data:
             return None
-        return Job.from_dict(json.loads(data))
+        return Job.from_dict(self._decode_job_blob(data))
     
     def update_job(self, job: Job) -> None:
         """Update job data in Redis."""
-        self.redis.hset(self.JOBS_KEY, job.id, json.dumps(job.to_dict()))
+        self.redis.hset(self.JOBS_KEY, job.id, self._encode_job(job.to_dict()))
     
     def get_next_job(self, worker_id: str) -> Optional[Job]:
         """
@@ -174,23 +265,77 @@ class JobQueue:
         Returns:
             Job if one is available, None otherwise
         """
-        # Pop from queue (blocking with timeout)
-        result = self.redis.blpop(self.QUEUE_KEY, timeout=5)
-        if not result:
+        # Move the claim into the in-flight list atomically (blocking, on the
+        # dedicated queue pool): if this worker dies before finishing, the
+        # reaper finds the ID there and requeues it instead of losing the job.
+        job_id = self._queue.blmove(self.QUEUE_KEY, self.IN_FLIGHT_KEY, 5, "LEFT", "RIGHT")
+        if not job_id:
             return None
-        
-        _, job_id = result
+
         job = self.get_job(job_id)
-        
+
         if job:
             job.status = JobStatus.RUNNING
             job.started_at = datetime.now().isoformat()
             job.worker_id = worker_id
             job.current_step = "Starting..."
-            self.update_job(job)
+            # Write the claim and its bookkeeping in one round-trip
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hset(self.JOBS_KEY, job.id, self._encode_job(job.to_dict()))
+            pipe.zadd(self.IN_FLIGHT_STARTED_KEY, {job.id: time.time()})
+            pipe.execute()
             logger.info(f"Worker {worker_id} claimed job {job.id}")
-        
+        else:
+            # Job blob vanished; drop the orphaned claim
+            self._queue.lrem(self.IN_FLIGHT_KEY, 1, job_id)
+
         return job
+
+    def _clear_in_flight(self, job_id: str) -> None:
+        """Drop a finished job's claim from the in-flight bookkeeping."""
+        self._queue.lrem(self.IN_FLIGHT_KEY, 1, job_id)
+        self.redis.zrem(self.IN_FLIGHT_STARTED_KEY, job_id)
+
+    def renew_lease(self, job_id: str) -> None:
+        """Refresh an in-flight job's claim time so the reaper leaves it alone.
+
+        The claim score is otherwise written once at claim time, so any job
+        legitimately running longer than STALE_JOB_SECONDS (multi-minute
+        scrapes with VPN rotations) would be requeued and run twice. XX keeps
+        this from resurrecting a claim complete_job/fail_job already cleared.
+        """
+        self.redis.zadd(self.IN_FLIGHT_STARTED_KEY, {job_id: time.time()}, xx=True)
+
+    def requeue_stale_jobs(self) -> int:
+        """Requeue in-flight jobs whose worker died; DLQ repeat offenders.
+
+        BLMOVE claims stay in the in-flight list until complete_job/fail_job
+        clears them, so a crashed worker leaves its job stranded there. Runs
+        from the worker loop; returns the number of jobs requeued.
+        """
+        cutoff = time.time() - self.STALE_JOB_SECONDS
+        stale = self.redis.zrangebyscore(self.IN_FLIGHT_STARTED_KEY, '-inf', cutoff)
+        requeued = 0
+        for job_id in stale:
+            if isinstance(job_id, bytes):
+                job_id = job_id.decode()
+            self._clear_in_flight(job_id)
+            job = self.get_job(job_id)
+            if not job or job.status != JobStatus.RUNNING:
+                continue
+            if job.retries >= self.MAX_RETRIES:
+                self.redis.rpush(self.DLQ_KEY, job_id)
+                self.fail_job(job, f"Abandoned by worker {job.worker_id} after {job.retries} retries")
+                continue
+            job.retries += 1
+            job.status = JobStatus.PENDING
+            job.worker_id = None
+            job.current_step = f"Requeued (attempt {job.retries + 1})"
+            self.update_job(job)
+            self._queue.rpush(self.QUEUE_KEY, job_id)
+            requeued += 1
+            logger.warning(f"Requeued stale job {job_id} (retry {job.retries})")
+        return requeued
     
     def complete_job(
         self,
@@ -202,7 +347,12 @@ class JobQueue:
         retweets_scraped: int,
         all_tweets: Optional[List[Dict[str, Any]]] = None,
     ) -> None:
-        """Mark a job as completed with results."""
+        """Mark a job as completed with results.
+
+        all_tweets is stored pre-sorted (flagged first, then by date) so the
+        paginated tweets endpoint can slice pages without re-sorting the full
+        list on every request - the sort happens once per job, here.
+        """
         job.status = JobStatus.COMPLETED
         job.completed_at = datetime.now().isoformat()
         job.progress = 100
@@ -213,8 +363,16 @@ class JobQueue:
         job.tweets_scraped = tweets_scraped
         job.retweets_scraped = retweets_scraped
         if all_tweets is not None:
-            job.all_tweets = all_tweets
+            job.all_tweets = sorted(
+                all_tweets,
+                key=lambda t: (not t.get("flagged", False), t.get("date", "")),
+            )
+            job.total_flagged = sum(
+                1 for t in job.all_tweets if t.get("flagged", False)
+            )
         self.update_job(job)
+        self._clear_in_flight(job.id)
+        self._last_progress.pop(job.id, None)
         logger.info(f"Job {job.id} completed with {len(job.all_tweets)} total tweets")
     
     def fail_job(self, job: Job, error: str) -> None:
@@ -224,6 +382,8 @@ class JobQueue:
         job.current_step = "Failed"
         job.error = error
         self.update_job(job)
+        self._clear_in_flight(job.id)
+        self._last_progress.pop(job.id, None)
         logger.error(f"Job {job.id} failed: {error}")
     
     def update_progress(
@@ -234,35 +394,115 @@ class JobQueue:
         tweets_scraped: int = 0,
         retweets_scraped: int = 0,
     ) -> None:
-        """Update job progress."""
+        """Update job progress.
+
+        Called from scraping hot loops, so near-identical updates (same step,
+        progress moved by <2%) are dropped rather than rewriting the full job
+        blob over the wire every page.
+        """
+        last = self._last_progress.get(job.id)
+        if last is not None:
+            last_progress, last_step = last
+            if current_step == last_step and abs(progress - last_progress) < 2:
+                # Keep the in-memory object fresh even when skipping the write
+                job.progress = progress
+                job.tweets_scraped = tweets_scraped
+                job.retweets_scraped = retweets_scraped
+                self.renew_lease(job.id)
+                return
         job.progress = progress
         job.current_step = current_step
         job.tweets_scraped = tweets_scraped
         job.retweets_scraped = retweets_scraped
         self.update_job(job)
+        self.renew_lease(job.id)
+        self._last_progress[job.id] = (progress, current_step)
+        self._publish_progress(job)
+
+    def _publish_progress(self, job: Job) -> None:
+        """Push a compact progress delta for live subscribers.
+
+        Lets UI layers subscribe to hyperdrive:progress:{id} instead of
+        re-polling the full job blob; an ~80-byte message replaces a multi-KB
+        HGET per poll. Fire-and-forget - no subscribers is fine.
+        """
+        try:
+            self.redis.publish(
+                self.PROGRESS_CHANNEL + job.id,
+                _json_dumps({
+                    "p": job.progress,
+                    "s": job.current_step,
+                    "t": job.tweets_scraped,
+                    "r": job.retweets_scraped,
+                }),
+            )
+        except Exception as e:
+            logger.warning(f"Progress publish failed for {job.id}: {e}")
     
     def list_jobs(self, limit: int = 50) -> List[Job]:
-        """Get recent jobs."""
+        """Get recent jobs.
+
+        Uses the creation-time ZSET to fetch only the newest `limit` IDs and
+        HMGETs just those, instead of pulling and decoding the entire jobs
+        hash to Python-sort it.
+        """
+        jobs, _ = self.list_jobs_with_meta(limit)
+        return jobs
+
+    def list_jobs_with_meta(self, limit: int = 50) -> Tuple[List[Job], int]:
+        """Get recent jobs plus the pending-queue length.
+
+        The jobs dashboard needs both on every poll; folding the LLEN into
+        list_jobs' existing pipeline serves the whole view in two Redis round
+        trips instead of three.
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zcard(self.CTIME_KEY)
+        pipe.hlen(self.JOBS_KEY)
+        pipe.zrevrange(self.CTIME_KEY, 0, limit - 1)
+        pipe.llen(self.QUEUE_KEY)
+        indexed, total, ids, queue_length = pipe.execute()
+
+        if indexed < total:
+            # Jobs created before the index existed: fall back to a full scan
+            return self._list_jobs_full_scan(limit), queue_length
+
+        if not ids:
+            return [], queue_length
+
+        jobs = []
+        for job_data in self.redis.hmget(self.JOBS_KEY, ids):
+            if not job_data:
+                continue
+            try:
+                jobs.append(Job.from_dict(self._decode_job_blob(job_data)))
+            except Exception as e:
+                logger.error(f"Error parsing job: {e}")
+        return jobs, queue_length
+
+    def _list_jobs_full_scan(self, limit: int) -> List[Job]:
+        """Legacy path: decode every job and sort in Python."""
         all_jobs = self.redis.hgetall(self.JOBS_KEY)
         jobs = []
         for job_data in all_jobs.values():
             try:
-                jobs.append(Job.from_dict(json.loads(job_data)))
+                jobs.append(Job.from_dict(self._decode_job_blob(job_data)))
             except Exception as e:
                 logger.error(f"Error parsing job: {e}")
-        
+
         # Sort by created_at descending
         jobs.sort(key=lambda j: j.created_at, reverse=True)
         return jobs[:limit]
     
     def get_queue_length(self) -> int:
         """Get number of pending jobs."""
-        return self.redis.llen(self.QUEUE_KEY)
+        return self._queue.llen(self.QUEUE_KEY)
     
     def clear_all(self) -> None:
         """Clear all jobs (for testing)."""
         self.redis.delete(self.JOBS_KEY)
         self.redis.delete(self.QUEUE_KEY)
+        self.redis.delete(self.CTIME_KEY)
         logger.warning("Cleared all jobs")
     
     def register_worker(self, worker_id: str, nitter_url: str) -> None:
@@ -273,7 +513,7 @@ class JobQueue:
             "last_seen": datetime.now().isoformat(),
             "status": "idle"
         }
-        self.redis.hset(self.WORKERS_KEY, worker_id, json.dumps(data))
+        self.redis.hset(self.WORKERS_KEY, worker_id, _json_dumps(data))
         # Set expiry on worker key (30 seconds)
         self.redis.expire(self.WORKERS_KEY, 60)
     
@@ -281,14 +521,14 @@ class JobQueue:
         """Update worker heartbeat."""
         existing = self.redis.hget(self.WORKERS_KEY, worker_id)
         if existing:
-            data = json.loads(existing)
+            data = _json_loads(existing)
         else:
             data = {"id": worker_id}
         
         data["last_seen"] = datetime.now().isoformat()
         data["status"] = status
         data["current_job"] = current_job
-        self.redis.hset(self.WORKERS_KEY, worker_id, json.dumps(data))
+        self.redis.hset(self.WORKERS_KEY, worker_id, _json_dumps(data))
     
     def get_active_workers(self) -> List[Dict[str, Any]]:
         """Get list of active workers."""
@@ -298,7 +538,7 @@ class JobQueue:
         
         for worker_data in all_workers.values():
             try:
-                data = json.loads(worker_data)
+                data = _json_loads(worker_data)
                 # Check if worker is still alive (seen in last 30 seconds)
                 last_seen = datetime.fromisoformat(data.get("last_seen", "2000-01-01"))
                 if (now - last_seen).total_seconds() < 30:
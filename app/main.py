@@ -8,18 +8,23 @@ Supports:
 - Gemini analysis
 """
 
+import asyncio
+import heapq
 import logging
 import os
 from contextlib import asynccontextmanager
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional
 
+import httpx
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response
 from fastapi.templating import Jinja2Templates
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 from .scraper_search import NitterSearchScraper
 from .scraper_timeline import NitterTimelineScraper
@@ -39,6 +44,17 @@ logging.basicConfig(
 )
 logger = logging.getLogger("api")
 
+
+@lru_cache(maxsize=256)
+def _parse_ymd(s: Optional[str]) -> Optional[datetime]:
+    """Parse a YYYY-MM-DD date, memoized.
+
+    fromisoformat is a C fast path (strptime re-parses the format string per
+    call), and clients tend to resubmit the same date ranges.
+    """
+    return datetime.fromisoformat(s) if s else None
+
+
 # Get configuration from environment
 NITTER_URL = os.getenv("NITTER_URL", "http://localhost:8080")
 DOCKER_COMPOSE_PATH = os.getenv("DOCKER_COMPOSE_PATH", ".")
@@ -55,22 +71,43 @@ async def lifespan(app: FastAPI):
     logger.info("=" * 60)
     logger.info("NITTER TWEET ANALYZER - STARTING UP")
     logger.info("=" * 60)
-    logger.info(f"Nitter URL: {NITTER_URL}")
-    logger.info(f"Docker Compose Path: {DOCKER_COMPOSE_PATH}")
-    logger.info(f"Redis URL: {REDIS_URL}")
-    logger.info(f"Gemini API key configured: {bool(os.getenv('GEMINI_API_KEY'))}")
+    logger.info("Nitter URL: %s", NITTER_URL)
+    logger.info("Docker Compose Path: %s", DOCKER_COMPOSE_PATH)
+    logger.info("Redis URL: %s", REDIS_URL)
+    logger.info("Gemini API key configured: %s", bool(os.getenv("GEMINI_API_KEY")))
     
     # Initialize job queue
     try:
         job_queue = JobQueue(REDIS_URL)
         logger.info("Job queue connected to Redis")
     except Exception as e:
-        logger.warning(f"Could not connect to Redis: {e}")
+        logger.warning("Could not connect to Redis: %s", e)
         logger.warning("Job queue features will be disabled")
     
+    # Shared HTTP client with keepalive so status probes and other outbound
+    # calls reuse connections instead of handshaking per request
+    app.state.http = httpx.AsyncClient(
+        timeout=5.0,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+    )
+
+    # Separate pooled client for the scrapers: longer timeout, redirects, and
+    # a browser UA. Injecting it keeps Nitter connections alive across page
+    # fetches and across scrapes instead of handshaking per endpoint call.
+    app.state.scrape_client = httpx.AsyncClient(
+        timeout=30.0,
+        follow_redirects=True,
+        headers={
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+        },
+        limits=httpx.Limits(max_connections=128, max_keepalive_connections=64),
+    )
+
     logger.info("=" * 60)
     yield
     logger.info("Shutting down...")
+    await app.state.http.aclose()
+    await app.state.scrape_client.aclose()
 
 
 app = FastAPI(
@@ -78,6 +115,7 @@ app = FastAPI(
     description="Scrape tweets via Nitter and analyze them with Gemini",
     version="2.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS - allow Netlify and local development
@@ -89,11 +127,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large JSON bodies (paginated tweets, job lists); small responses
+# skip compression entirely
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Setup templates
 templates_dir = os.path.join(os.path.dirname(__file__), "templates")
 templates = Jinja2Templates(directory=templates_dir)
 
 
+def _validate_ymd(v: Optional[str]) -> Optional[str]:
+    """Reject malformed dates at request validation (HTTP 422) instead of
+    blowing up mid-handler; endpoints still parse via the cached _parse_ymd."""
+    if v:
+        _parse_ymd(v)
+    return v
+
+
 # Request/Response Models
 class ScrapeSearchRequest(BaseModel):
     """Request for search-based scraping (tweets/replies)."""
@@ -104,6 +154,8 @@ class ScrapeSearchRequest(BaseModel):
     include_replies: bool = Field(default=True, description="Include replies in search")
     max_tweets: int = Field(default=5000, description="Max tweets to scrape")
 
+    _check_dates = field_validator("start_date", "end_date")(_validate_ymd)
+
 
 class ScrapeRetweetsRequest(BaseModel):
     """Request for timeline retweet scraping."""
@@ -122,6 +174,8 @@ class AnalyzeRequest(BaseModel):
     max_tweets: int = Field(default=5000, description="Max tweets to scrape")
     custom_prompt: Optional[str] = Field(default=None, description="Custom analysis prompt")
 
+    _check_dates = field_validator("start_date", "end_date")(_validate_ymd)
+
 
 class TweetData(BaseModel):
     """Tweet data for responses."""
@@ -216,8 +270,11 @@ class JobSubmitRequest(BaseModel):
     include_tweets: bool = Field(default=True)
     include_retweets: bool = Field(default=True)
     include_replies: bool = Field(default=True)
+    max_tweets: int = Field(default=5000, description="Max tweets to scrape")
     custom_prompt: Optional[str] = Field(default=None)
 
+    _check_dates = field_validator("start_date", "end_date")(_validate_ymd)
+
 
 class InstagramJobRequest(BaseModel):
     """Request to submit an Instagram analysis job."""
@@ -227,6 +284,8 @@ class InstagramJobRequest(BaseModel):
     max_posts: int = Field(default=50, description="Maximum posts to analyze")
     custom_prompt: Optional[str] = Field(default=None)
 
+    _check_dates = field_validator("start_date", "end_date")(_validate_ymd)
+
 
 class JobSubmitResponse(BaseModel):
     """Response when submitting a job."""
@@ -297,22 +356,25 @@ async def submit_job(request: JobSubmitRequest):
     if not username:
         raise HTTPException(status_code=400, detail="Username is required")
     
-    job = job_queue.create_job(
+    job = await asyncio.to_thread(
+        job_queue.create_job,
         username=username,
         start_date=request.start_date,
         end_date=request.end_date,
         include_tweets=request.include_tweets,
         include_retweets=request.include_retweets,
         include_replies=request.include_replies,
+        max_tweets=request.max_tweets,
         custom_prompt=request.custom_prompt,
     )
-    
-    logger.info(f"Job {job.id} submitted for @{username}")
-    
+
+    logger.info("Job %s submitted for @%s", job.id, username)
+
+    queue_length = await asyncio.to_thread(job_queue.get_queue_length)
     return JobSubmitResponse(
         job_id=job.id,
         status=job.status.value,
-        message=f"Job queued. Position: {job_queue.get_queue_length()}",
+        message=f"Job queued. Position: {queue_length}",
     )
 
 
@@ -329,7 +391,8 @@ async def submit_instagram_job(request: InstagramJobRequest):
     if not username:
         raise HTTPException(status_code=400, detail="Username is required")
     
-    job = job_queue.create_job(
+    job = await asyncio.to_thread(
+        job_queue.create_job,
         username=username,
         start_date=request.start_date,
         end_date=request.end_date,
@@ -340,13 +403,14 @@ async def submit_instagram_job(request: InstagramJobRequest):
         include_retweets=False,
         include_replies=False,
     )
-    
-    logger.info(f"Instagram job {job.id} submitted for @{username}")
-    
+
+    logger.info("Instagram job %s submitted for @%s", job.id, username)
+
+    queue_length = await asyncio.to_thread(job_queue.get_queue_length)
     return JobSubmitResponse(
         job_id=job.id,
         status=job.status.value,
-        message=f"Instagram job queued. Position: {job_queue.get_queue_length()}",
+        message=f"Instagram job queued. Position: {queue_length}",
     )
 
 
@@ -356,7 +420,7 @@ async def get_job_status(job_id: str):
     if not job_queue:
         raise HTTPException(status_code=503, detail="Job queue not available")
     
-    job = job_queue.get_job(job_id)
+    job = await asyncio.to_thread(job_queue.get_job, job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
@@ -406,17 +470,28 @@ async def get_job_tweets(
     if not job_queue:
         raise HTTPException(status_code=503, detail="Job queue not available")
     
-    job = job_queue.get_job(job_id)
+    job = await asyncio.to_thread(job_queue.get_job, job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
     all_tweets = job.all_tweets or []
-    
-    # Sort: flagged first if requested, then by date
+
+    # complete_job stores tweets already sorted flagged-first-then-date, so
+    # the default ordering is a straight slice; only the date-descending view
+    # still needs a sort.
+    total_tweets = len(all_tweets)
+    total_pages = (total_tweets + per_page - 1) // per_page if per_page > 0 else 1
+
+    start_idx = (page - 1) * per_page
+    end_idx = start_idx + per_page
+
     if flagged_first:
-        sorted_tweets = sorted(
-            all_tweets,
-            key=lambda t: (not t.get("flagged", False), t.get("date", "")),
+        sorted_tweets = all_tweets
+    elif 0 < end_idx <= total_tweets // 2:
+        # Early pages only need the top end_idx dates: a heap-based partial
+        # sort is O(N log end_idx) vs O(N log N) for sorting all of them
+        sorted_tweets = heapq.nlargest(
+            end_idx, all_tweets, key=lambda t: t.get("date", "")
         )
     else:
         sorted_tweets = sorted(
@@ -424,40 +499,19 @@ async def get_job_tweets(
             key=lambda t: t.get("date", ""),
             reverse=True,
         )
-    
-    # Count flagged
-    total_flagged = sum(1 for t in all_tweets if t.get("flagged", False))
-    
-    # Paginate
-    total_tweets = len(sorted_tweets)
-    total_pages = (total_tweets + per_page - 1) // per_page if per_page > 0 else 1
-    
-    start_idx = (page - 1) * per_page
-    end_idx = start_idx + per_page
+
+    # Counted once at completion; recompute only for jobs stored before the
+    # field existed
+    total_flagged = job.total_flagged
+    if not total_flagged and all_tweets:
+        total_flagged = sum(1 for t in all_tweets if t.get("flagged", False))
+
     page_tweets = sorted_tweets[start_idx:end_idx]
     
-    # Convert to response model
-    tweet_responses = [
-        StoredTweet(
-            index=t.get("index", 0),
-            id=t.get("id", ""),
-            text=t.get("text", ""),
-            date=t.get("date", ""),
-            url=t.get("url", ""),
-            is_retweet=t.get("is_retweet", False),
-            original_author=t.get("original_author"),
-            images=t.get("images", []),
-            flagged=t.get("flagged", False),
-            flag_reason=t.get("flag_reason"),
-            # Instagram-specific fields
-            likes=t.get("likes", 0),
-            comments=t.get("comments", 0),
-            image_description=t.get("image_description", ""),
-            is_story=t.get("is_story", False),
-            is_video=t.get("is_video", False),
-        )
-        for t in page_tweets
-    ]
+    # Convert to response model. The dicts were validated when the worker
+    # stored them, so model_construct skips re-validating every field on
+    # every page request; missing keys fall back to the model defaults.
+    tweet_responses = [StoredTweet.model_construct(**t) for t in page_tweets]
     
     return PaginatedTweetsResponse(
         job_id=job.id,
@@ -478,12 +532,15 @@ async def list_jobs(limit: int = 20):
     if not job_queue:
         raise HTTPException(status_code=503, detail="Job queue not available")
     
-    jobs = job_queue.list_jobs(limit=limit)
+    jobs, queue_length = await asyncio.to_thread(job_queue.list_jobs_with_meta, limit)
     
+    # These come straight from our own Redis store, so skip re-validation
+    # with model_construct rather than paying full pydantic validation for
+    # every job (and every nested highlight) on each poll.
     job_responses = []
     for job in jobs:
         highlighted = [
-            HighlightedTweet(
+            HighlightedTweet.model_construct(
                 text=ht.get("text", ""),
                 reason=ht.get("reason", ""),
                 url=ht.get("url", ""),
@@ -491,7 +548,7 @@ async def list_jobs(limit: int = 20):
             )
             for ht in job.highlighted_tweets
         ]
-        job_responses.append(JobStatusResponse(
+        job_responses.append(JobStatusResponse.model_construct(
             job_id=job.id,
             username=job.username,
             status=job.status.value,
@@ -511,7 +568,7 @@ async def list_jobs(limit: int = 20):
     
     return JobListResponse(
         jobs=job_responses,
-        queue_length=job_queue.get_queue_length(),
+        queue_length=queue_length,
     )
 
 
@@ -521,7 +578,7 @@ async def get_workers():
     if not job_queue:
         return {"workers": [], "count": 0}
     
-    workers = job_queue.get_active_workers()
+    workers = await asyncio.to_thread(job_queue.get_active_workers)
     return {
         "workers": workers,
         "count": len(workers)
@@ -531,49 +588,90 @@ async def get_workers():
 # ==================== LEGACY DIRECT ENDPOINTS ====================
 
 
+def _tail(path: str, n: int, block_size: int = 65536) -> list[str]:
+    """Read the last n lines of a file by scanning backwards from EOF.
+
+    Bounds I/O and memory to the requested tail instead of loading the whole
+    (potentially huge) log file per request.
+    """
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        remaining = f.tell()
+        chunks = []
+        newlines = 0
+        while remaining > 0 and newlines <= n:
+            read_size = min(block_size, remaining)
+            remaining -= read_size
+            f.seek(remaining)
+            chunk = f.read(read_size)
+            newlines += chunk.count(b'\n')
+            chunks.append(chunk)
+    data = b''.join(reversed(chunks))
+    lines = data.decode(errors='replace').splitlines(keepends=True)
+    return lines[-n:]
+
+
 @app.get("/api/logs")
 async def get_logs(lines: int = 100):
     """Get recent app logs."""
-    import subprocess
     try:
         # Try to read the app.log file
         log_file = "app.log"
         if os.path.exists(log_file):
-            with open(log_file, "r") as f:
-                all_lines = f.readlines()
-                recent = all_lines[-lines:] if len(all_lines) > lines else all_lines
-                return {"logs": "".join(recent), "total_lines": len(all_lines)}
+            recent = await asyncio.to_thread(_tail, log_file, lines)
+            return {"logs": "".join(recent), "total_lines": len(recent)}
         else:
             return {"logs": "No log file found", "total_lines": 0}
     except Exception as e:
         return {"logs": f"Error reading logs: {str(e)}", "total_lines": 0}
 
 
+_STATUS_CACHE_TTL = 5.0  # Dashboards poll /api/status; probe at most once per window
+_status_cache = {"value": None, "ts": 0.0}
+
+
 @app.get("/api/status")
 async def get_status():
     """Get system status including VPN and Docker."""
-    import subprocess
+    import time
+
+    # Serve from cache while fresh: each cold call forks a mullvad process
+    # and makes an HTTP probe, which multiple polling dashboards would
+    # otherwise repeat every few seconds.
+    if _status_cache["value"] is not None and time.monotonic() - _status_cache["ts"] < _STATUS_CACHE_TTL:
+        return _status_cache["value"]
+
     status = {
         "app": "running",
         "vpn": "unknown",
         "nitter": "unknown",
     }
-    
+
     try:
-        # Check Mullvad status
-        result = subprocess.run(["mullvad", "status"], capture_output=True, text=True, timeout=5)
-        status["vpn"] = result.stdout.strip().split('\n')[0] if result.returncode == 0 else "not installed"
+        # Check Mullvad status without blocking the event loop
+        proc = await asyncio.create_subprocess_exec(
+            "mullvad", "status",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        try:
+            out, _ = await asyncio.wait_for(proc.communicate(), timeout=5)
+        except asyncio.TimeoutError:
+            proc.kill()
+            raise
+        status["vpn"] = out.decode().strip().split('\n')[0] if proc.returncode == 0 else "not installed"
     except:
         status["vpn"] = "not available"
     
     try:
-        # Check if Nitter is responding
-        import httpx
-        resp = httpx.get(f"{NITTER_URL}/", timeout=5)
+        # Check if Nitter is responding (pooled client from lifespan)
+        resp = await app.state.http.get(f"{NITTER_URL}/")
         status["nitter"] = "running" if resp.status_code == 200 else f"error: {resp.status_code}"
     except Exception as e:
         status["nitter"] = f"error: {str(e)}"
-    
+
+    _status_cache["value"] = status
+    _status_cache["ts"] = time.monotonic()
     return status
 
 
@@ -587,23 +685,20 @@ async def scrape_search(request: ScrapeSearchRequest):
     if not username:
         raise HTTPException(status_code=400, detail="Username is required")
 
-    logger.info(f"POST /api/scrape/search - @{username}")
-    logger.info(f"  Date range: {request.start_date} to {request.end_date}")
-    logger.info(f"  Include RTs: {request.include_retweets}, Replies: {request.include_replies}")
+    logger.info("POST /api/scrape/search - @%s", username)
+    logger.info("  Date range: %s to %s", request.start_date, request.end_date)
+    logger.info("  Include RTs: %s, Replies: %s", request.include_retweets, request.include_replies)
 
     # Parse dates
-    start_date = None
-    end_date = None
-    if request.start_date:
-        start_date = datetime.strptime(request.start_date, "%Y-%m-%d")
-    if request.end_date:
-        end_date = datetime.strptime(request.end_date, "%Y-%m-%d")
+    start_date = _parse_ymd(request.start_date)
+    end_date = _parse_ymd(request.end_date)
 
     async with NitterSearchScraper(
         nitter_url=NITTER_URL,
         delay_seconds=0.5,
         max_tweets=request.max_tweets,
         docker_compose_path=DOCKER_COMPOSE_PATH,
+        client=app.state.scrape_client,
     ) as scraper:
         result = await scraper.scrape_user(
             username=username,
@@ -613,8 +708,10 @@ async def scrape_search(request: ScrapeSearchRequest):
             include_replies=request.include_replies,
         )
 
+    # These come from our own typed Tweet dataclass; model_construct skips
+    # re-validating thousands of rows per response
     tweets_data = [
-        TweetData(
+        TweetData.model_construct(
             id=t.id,
             content=t.content,
             timestamp=t.timestamp,
@@ -627,7 +724,7 @@ async def scrape_search(request: ScrapeSearchRequest):
         for t in result.tweets
     ]
 
-    logger.info(f"  Result: {result.total_scraped} tweets, restarts={scraper.restart_count}")
+    logger.info("  Result: %s tweets, restarts=%s", result.total_scraped, scraper.restart_count)
 
     return ScrapeResponse(
         username=username,
@@ -649,19 +746,21 @@ async def scrape_retweets(request: ScrapeRetweetsRequest):
     if not username:
         raise HTTPException(status_code=400, detail="Username is required")
 
-    logger.info(f"POST /api/scrape/retweets - @{username}")
-    logger.info(f"  Max retweets: {request.max_retweets}")
+    logger.info("POST /api/scrape/retweets - @%s", username)
+    logger.info("  Max retweets: %s", request.max_retweets)
 
     async with NitterTimelineScraper(
         nitter_url=NITTER_URL,
         delay_seconds=0.5,
         max_retweets=request.max_retweets,
         docker_compose_path=DOCKER_COMPOSE_PATH,
+        client=app.state.scrape_client,
     ) as scraper:
         result = await scraper.scrape_retweets(username=username)
 
+    # Typed Tweet dataclass input - skip per-row validation here too
     tweets_data = [
-        TweetData(
+        TweetData.model_construct(
             id=t.id,
             content=t.content,
             timestamp=t.timestamp,
@@ -674,7 +773,7 @@ async def scrape_retweets(request: ScrapeRetweetsRequest):
         for t in result.tweets
     ]
 
-    logger.info(f"  Result: {result.total_scraped} retweets, restarts={scraper.restart_count}")
+    logger.info("  Result: %s retweets, restarts=%s", result.total_scraped, scraper.restart_count)
 
     return ScrapeResponse(
         username=username,
@@ -686,10 +785,15 @@ async def scrape_retweets(request: ScrapeRetweetsRequest):
     )
 
 
-@app.post("/api/analyze", response_model=AnalyzeResponse)
-async def analyze_tweets(request: AnalyzeRequest):
+@app.post("/api/analyze", response_model=None)
+async def analyze_tweets(request: AnalyzeRequest, inline: bool = False):
     """
     Full analysis: scrape tweets + retweets, then analyze with Gemini.
+
+    By default this submits a high-priority job to the queue and returns
+    immediately with a job_id (poll /api/jobs/{job_id} for results), so the
+    HTTP connection isn't held open for a multi-minute pipeline. Pass
+    ?inline=true for the legacy synchronous behaviour.
     """
     username = request.username.lstrip("@").strip()
     if not username:
@@ -699,9 +803,31 @@ async def analyze_tweets(request: AnalyzeRequest):
     if not gemini_key:
         raise HTTPException(status_code=500, detail="GEMINI_API_KEY not configured")
 
-    logger.info(f"POST /api/analyze - @{username}")
-    logger.info(f"  Date range: {request.start_date} to {request.end_date}")
-    logger.info(f"  Tweets: {request.include_tweets}, RTs: {request.include_retweets}, Replies: {request.include_replies}")
+    if not inline:
+        if not job_queue:
+            raise HTTPException(status_code=503, detail="Job queue not available (Redis not connected); retry with ?inline=true")
+        job = await asyncio.to_thread(
+            job_queue.create_job,
+            username=username,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            include_tweets=request.include_tweets,
+            include_retweets=request.include_retweets,
+            include_replies=request.include_replies,
+            max_tweets=request.max_tweets,
+            custom_prompt=request.custom_prompt,
+            priority="high",
+        )
+        logger.info("POST /api/analyze - @%s queued as job %s", username, job.id)
+        return JobSubmitResponse(
+            job_id=job.id,
+            status=job.status.value,
+            message=f"Analysis queued. Poll /api/jobs/{job.id} for results.",
+        )
+
+    logger.info("POST /api/analyze - @%s", username)
+    logger.info("  Date range: %s to %s", request.start_date, request.end_date)
+    logger.info("  Tweets: %s, RTs: %s, Replies: %s", request.include_tweets, request.include_retweets, request.include_replies)
 
     all_tweets = []
     retweets_count = 0
@@ -709,36 +835,31 @@ async def analyze_tweets(request: AnalyzeRequest):
     total_restarts = 0
 
     # Parse dates
-    start_date = None
-    end_date = None
-    if request.start_date:
-        start_date = datetime.strptime(request.start_date, "%Y-%m-%d")
-    if request.end_date:
-        end_date = datetime.strptime(request.end_date, "%Y-%m-%d")
-
-    # Step 1: Scrape retweets from timeline (if requested)
-    if request.include_retweets:
+    start_date = _parse_ymd(request.start_date)
+    end_date = _parse_ymd(request.end_date)
+
+    # Steps 1+2: the timeline and search scrapes hit different Nitter
+    # endpoints and share no state until the merge, so run them concurrently
+    async def _scrape_timeline():
         logger.info("[Step 1] Scraping retweets from timeline...")
         async with NitterTimelineScraper(
             nitter_url=NITTER_URL,
             delay_seconds=0.5,
             max_retweets=request.max_tweets,
             docker_compose_path=DOCKER_COMPOSE_PATH,
+            client=app.state.scrape_client,
         ) as scraper:
             rt_result = await scraper.scrape_retweets(username=username)
-            all_tweets.extend(rt_result.tweets)
-            retweets_count = rt_result.total_scraped
-            total_restarts += scraper.restart_count
-        logger.info(f"[Step 1] Got {retweets_count} retweets")
+            return rt_result, scraper.restart_count
 
-    # Step 2: Scrape tweets/replies from search (if requested)
-    if request.include_tweets or request.include_replies:
+    async def _scrape_search():
         logger.info("[Step 2] Scraping tweets/replies via search...")
         async with NitterSearchScraper(
             nitter_url=NITTER_URL,
             delay_seconds=0.5,
             max_tweets=request.max_tweets,
             docker_compose_path=DOCKER_COMPOSE_PATH,
+            client=app.state.scrape_client,
         ) as scraper:
             search_result = await scraper.scrape_user(
                 username=username,
@@ -747,10 +868,43 @@ async def analyze_tweets(request: AnalyzeRequest):
                 include_retweets=False,  # Already got from timeline
                 include_replies=request.include_replies,
             )
+            return search_result, scraper.restart_count
+
+    coros = []
+    if request.include_retweets:
+        coros.append(_scrape_timeline())
+    if request.include_tweets or request.include_replies:
+        coros.append(_scrape_search())
+
+    outcomes = await asyncio.gather(*coros, return_exceptions=True)
+
+    # gather preserves submission order, so walk outcomes alongside the same
+    # conditions used to build coros
+    scrape_error = None
+    idx = 0
+    if request.include_retweets:
+        outcome = outcomes[idx]
+        idx += 1
+        if isinstance(outcome, BaseException):
+            logger.error("Timeline scrape failed: %s", outcome)
+            scrape_error = str(outcome)
+        else:
+            rt_result, restarts = outcome
+            all_tweets.extend(rt_result.tweets)
+            retweets_count = rt_result.total_scraped
+            total_restarts += restarts
+            logger.info("[Step 1] Got %s retweets", retweets_count)
+    if request.include_tweets or request.include_replies:
+        outcome = outcomes[idx]
+        if isinstance(outcome, BaseException):
+            logger.error("Search scrape failed: %s", outcome)
+            scrape_error = str(outcome)
+        else:
+            search_result, restarts = outcome
             all_tweets.extend(search_result.tweets)
             tweets_count = search_result.total_scraped
-            total_restarts += scraper.restart_count
-        logger.info(f"[Step 2] Got {tweets_count} tweets/replies")
+            total_restarts += restarts
+            logger.info("[Step 2] Got %s tweets/replies", tweets_count)
 
     if not all_tweets:
         return AnalyzeResponse(
@@ -759,73 +913,52 @@ async def analyze_tweets(request: AnalyzeRequest):
             retweets_scraped=0,
             analysis="No tweets found to analyze.",
             themes=[],
-            error="No content found",
+            error=scrape_error or "No content found",
         )
 
-    # Step 3: Compile and analyze with Gemini
-    logger.info(f"[Step 3] Analyzing {len(all_tweets)} total items with Gemini...")
-    
-    # Build lookup for tweet content -> tweet data (for matching highlighted tweets later)
-    tweet_lookup = {}
-    for t in all_tweets:
-        # Use first 100 chars of content as key for matching
-        key = t.content[:100].lower().strip() if t.content else ""
-        if key:
-            tweet_lookup[key] = {
-                "url": getattr(t, 'url', ''),
-                "images": getattr(t, 'images', []),
-            }
-    
-    # Compile tweets for analysis - include retweet info and original author
-    compiled_lines = []
-    for t in all_tweets:
-        if getattr(t, 'is_retweet', False):
-            original_author = getattr(t, 'original_author', 'unknown')
-            line = f"[RETWEET of @{original_author}] [{t.timestamp}] {t.content}"
-        else:
-            line = f"[{t.timestamp}] {t.content}"
-        compiled_lines.append(line)
-    compiled = "\n---\n".join(compiled_lines)
-    
-    # Truncate if too long (Gemini context limit)
-    if len(compiled) > 100000:
-        compiled = compiled[:100000] + "\n\n[TRUNCATED - too many tweets]"
+    # Step 3: Analyze with Gemini
+    logger.info("[Step 3] Analyzing %s total items with Gemini...", len(all_tweets))
+
+    # Build the indexed array the analyzer works against. Flags come back as
+    # indices into this list, so matching highlights to their URLs and images
+    # is a direct list lookup instead of fuzzy content-prefix matching.
+    indexed_tweets = []
+    for idx, t in enumerate(all_tweets):
+        indexed_tweets.append({
+            "index": idx,
+            "id": getattr(t, 'id', ''),
+            "text": getattr(t, 'content', ''),
+            "date": getattr(t, 'timestamp', ''),
+            "url": getattr(t, 'url', ''),
+            "is_retweet": getattr(t, 'is_retweet', False),
+            "original_author": getattr(t, 'original_author', None),
+            "images": getattr(t, 'images', []),
+        })
 
     try:
         analyzer = GeminiAnalyzer(api_key=gemini_key)
-        analysis_result = analyzer.analyze(
-            compiled_tweets=compiled,
+        analysis_result = await analyzer.analyze_async(
+            indexed_tweets=indexed_tweets,
             username=username,
-            tweet_count=len(all_tweets),
             custom_prompt=request.custom_prompt,
         )
-        logger.info(f"[Step 3] Analysis complete")
+        logger.info("[Step 3] Analysis complete")
     except Exception as e:
-        logger.error(f"Gemini error: {e}")
+        logger.error("Gemini error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
-    # Match highlighted tweets to their URLs and images
+    # Resolve flagged indices straight back to the scraped tweets
     highlighted_with_urls = []
-    for ht in analysis_result.highlighted_tweets:
-        text = ht.get("text", "")
-        reason = ht.get("reason", "")
-        
-        # Try to find matching tweet by content prefix
-        key = text[:100].lower().strip() if text else ""
-        matched = tweet_lookup.get(key, {})
-        
-        # Also try fuzzy matching if exact match fails
-        if not matched and text:
-            for lookup_key, data in tweet_lookup.items():
-                if lookup_key[:50] in text[:60].lower() or text[:50].lower() in lookup_key[:60]:
-                    matched = data
-                    break
-        
+    for flag in analysis_result.flagged_indices:
+        idx = flag.get("index")
+        if not isinstance(idx, int) or not 0 <= idx < len(indexed_tweets):
+            continue
+        t = indexed_tweets[idx]
         highlighted_with_urls.append(HighlightedTweet(
-            text=text,
-            reason=reason,
-            url=matched.get("url", ""),
-            images=matched.get("images", []),
+            text=t["text"],
+            reason=flag.get("reason", ""),
+            url=t["url"],
+            images=t["images"],
         ))
 
     return AnalyzeResponse(
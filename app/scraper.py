@@ -5,9 +5,11 @@ Scrapes tweets from a Nitter instance with pagination and rate-limit handling.
 """
 
 import asyncio
+import io
 import logging
 import os
 import re
+import time
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional
@@ -19,6 +21,14 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# lxml's C parser builds the tree roughly an order of magnitude faster than
+# the pure-Python html.parser; fall back gracefully when it isn't installed
+try:
+    import lxml  # noqa: F401
+    SOUP_PARSER = "lxml"
+except ImportError:
+    SOUP_PARSER = "html.parser"
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -27,8 +37,37 @@ logging.basicConfig(
 )
 logger = logging.getLogger("scraper")
 
-
-@dataclass
+# Extracts the tweet ID from hrefs like /username/status/1234567890
+_STATUS_RE = re.compile(r'/status/(\d+)')
+
+# Maps stat icon class tokens to the engagement counter they carry; both
+# the bare and icon- prefixed spellings are listed so token lookup matches
+# everything the old substring checks did
+_ICON_STAT_KINDS = {
+    'icon-comment': 'replies',
+    'comment': 'replies',
+    'icon-reply': 'replies',
+    'reply': 'replies',
+    'icon-retweet': 'retweets',
+    'retweet': 'retweets',
+    'icon-quote': 'quotes',
+    'quote': 'quotes',
+    'icon-heart': 'likes',
+    'heart': 'likes',
+    'icon-like': 'likes',
+    'like': 'likes',
+}
+
+# Recently fetched pages, keyed by full URL (which includes the cursor).
+# Re-running a scrape for the same user shortly afterwards serves repeat
+# pages from memory instead of burning the Nitter instance's rate-limit
+# budget again. Only clean 200s are stored.
+_PAGE_CACHE: dict[str, tuple[float, int, bytes]] = {}
+_PAGE_CACHE_TTL = float(os.getenv("NITTER_PAGE_CACHE_TTL", "3600"))
+_PAGE_CACHE_MAX = 512
+
+
+@dataclass(slots=True)
 class Tweet:
     """Represents a single tweet."""
     id: str
@@ -42,7 +81,7 @@ class Tweet:
     is_reply: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class ScrapeResult:
     """Result of a scraping operation."""
     username: str
@@ -52,34 +91,73 @@ class ScrapeResult:
     total_scraped: int = 0
 
 
+@dataclass
+class _CachedResponse:
+    """Minimal stand-in for an httpx.Response served from the page cache."""
+    status_code: int
+    content: bytes
+
+
+class _TokenBucket:
+    """Paces page fetches to a sustained rate while allowing a small burst.
+
+    Replaces the fixed inter-page sleep: a quiet instance is fetched at full
+    burst speed, while sustained scraping settles at the configured rate.
+    """
+
+    def __init__(self, rate: float, burst: int = 4):
+        self.rate = rate
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1.0
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self.rate)
+
+
 class NitterScraper:
     """Scrapes tweets from a Nitter instance."""
 
+    MAX_429_RETRIES = 5
+
     def __init__(
         self,
         nitter_url: Optional[str] = None,
         delay_seconds: float = 1.0,
         max_tweets: int = 500,
+        client: Optional[httpx.AsyncClient] = None,
     ):
         self.nitter_url = nitter_url or os.getenv("NITTER_URL", "http://localhost:8080")
         self.delay_seconds = delay_seconds
         self.max_tweets = max_tweets
-        self.client: Optional[httpx.AsyncClient] = None
+        # An injected client is shared (and kept open) by the caller, so its
+        # connection pool survives across scrapes; otherwise we own one for
+        # the duration of the context
+        self.client: Optional[httpx.AsyncClient] = client
+        self._owns_client = client is None
+        # delay_seconds doubles as the sustained pace: 0.5s/page -> 2 pages/s
+        self._pacer = _TokenBucket(rate=1.0 / delay_seconds if delay_seconds > 0 else 2.0)
         logger.info(f"NitterScraper initialized: url={self.nitter_url}, delay={delay_seconds}s, max_tweets={max_tweets}")
 
     async def __aenter__(self):
-        logger.info("Opening HTTP client connection")
-        self.client = httpx.AsyncClient(
-            timeout=30.0,
-            follow_redirects=True,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            }
-        )
+        if self.client is None:
+            logger.info("Opening HTTP client connection")
+            self.client = httpx.AsyncClient(
+                timeout=30.0,
+                follow_redirects=True,
+                headers={
+                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+                }
+            )
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.client:
+        if self.client and self._owns_client:
             logger.info("Closing HTTP client connection")
             await self.client.aclose()
 
@@ -91,10 +169,13 @@ class NitterScraper:
         if not text:
             return 0
         try:
-            if 'K' in text:
-                return int(float(text.replace('K', '').replace(',', '')) * 1000)
-            elif 'M' in text:
-                return int(float(text.replace('M', '').replace(',', '')) * 1_000_000)
+            # Suffix (if any) is always the last character; checking it
+            # directly avoids substring scans per stat
+            last = text[-1]
+            if last == 'K':
+                return int(float(text[:-1].replace(',', '')) * 1000)
+            elif last == 'M':
+                return int(float(text[:-1].replace(',', '')) * 1_000_000)
             else:
                 return int(text.replace(',', ''))
         except (ValueError, AttributeError):
@@ -110,7 +191,7 @@ class NitterScraper:
             
             href = tweet_link.get('href', '')
             # Extract tweet ID from URL like /username/status/1234567890
-            match = re.search(r'/status/(\d+)', href)
+            match = _STATUS_RE.search(href)
             if not match:
                 return None
             tweet_id = match.group(1)
@@ -125,25 +206,27 @@ class NitterScraper:
 
             # Get engagement stats
             stats = tweet_elem.select('.tweet-stat')
-            replies = retweets = quotes = likes = 0
             
+            counts = {}
             for stat in stats:
                 icon = stat.select_one('.icon-container')
                 value_elem = stat.select_one('.tweet-stat-value, .icon-container + span')
                 if not icon:
                     continue
-                
-                icon_class = ' '.join(icon.get('class', []))
-                value = value_elem.get_text(strip=True) if value_elem else "0"
-                
-                if 'comment' in icon_class or 'reply' in icon_class:
-                    replies = self._parse_stat(value)
-                elif 'retweet' in icon_class:
-                    retweets = self._parse_stat(value)
-                elif 'quote' in icon_class:
-                    quotes = self._parse_stat(value)
-                elif 'heart' in icon_class or 'like' in icon_class:
-                    likes = self._parse_stat(value)
+
+                # Token lookup instead of joining the class list and running
+                # four substring scans per stat
+                for cls in icon.get('class', []):
+                    kind = _ICON_STAT_KINDS.get(cls)
+                    if kind:
+                        value = value_elem.get_text(strip=True) if value_elem else "0"
+                        counts[kind] = self._parse_stat(value)
+                        break
+
+            replies = counts.get('replies', 0)
+            retweets = counts.get('retweets', 0)
+            quotes = counts.get('quotes', 0)
+            likes = counts.get('likes', 0)
 
             # Check if retweet
             retweet_header = tweet_elem.select_one('.retweet-header')
@@ -220,135 +303,180 @@ class NitterScraper:
         
         result = ScrapeResult(username=username)
         seen_ids = set()
-        cursor = None
         consecutive_empty = 0
         page_count = 0
 
-        while len(result.tweets) < self.max_tweets:
-            page_count += 1
-            
-            # Build URL
-            url = f"{self.nitter_url}/{username}"
-            if cursor:
-                url += f"?cursor={cursor}"
-
-            logger.info(f"")
-            logger.info(f"[PAGE {page_count}] Fetching...")
-
-            if progress_callback:
-                await progress_callback(
-                    len(result.tweets),
-                    f"Fetching page {page_count}... ({len(result.tweets)} tweets so far)"
-                )
-
-            try:
+        async def _fetch_page(url: str):
+            """Serve from the page cache when fresh; otherwise wait for a
+            pacer token, fetch, retry 429s with backoff, and cache clean
+            responses."""
+            cached = _PAGE_CACHE.get(url)
+            if cached and cached[0] > time.monotonic():
+                logger.info(f"Page cache hit: {url[:80]}")
+                return _CachedResponse(cached[1], cached[2])
+            response = None
+            for attempt in range(self.MAX_429_RETRIES):
+                await self._pacer.acquire()
                 response = await self.client.get(url)
-                logger.info(f"[PAGE {page_count}] Response: HTTP {response.status_code}")
-                
-                if response.status_code == 429:
-                    result.rate_limited = True
-                    result.error = "Rate limited by Nitter instance"
-                    logger.warning(f"RATE LIMITED after {len(result.tweets)} tweets on page {page_count}")
-                    break
-                
-                if response.status_code == 404:
-                    result.error = f"User @{username} not found"
-                    logger.error(f"User @{username} not found (404)")
-                    break
-                
-                if response.status_code != 200:
-                    result.error = f"HTTP error: {response.status_code}"
-                    logger.error(f"HTTP error: {response.status_code}")
+                if response.status_code != 429:
                     break
+                try:
+                    wait = float(response.headers.get("Retry-After", ""))
+                except ValueError:
+                    wait = 1.0
+                wait *= 2 ** attempt
+                logger.warning(f"HTTP 429, backing off {wait:.1f}s (attempt {attempt + 1}/{self.MAX_429_RETRIES})")
+                await asyncio.sleep(wait)
+            if response.status_code == 200 and b'error-panel' not in response.content:
+                if len(_PAGE_CACHE) >= _PAGE_CACHE_MAX:
+                    oldest = min(_PAGE_CACHE, key=lambda k: _PAGE_CACHE[k][0])
+                    del _PAGE_CACHE[oldest]
+                _PAGE_CACHE[url] = (
+                    time.monotonic() + _PAGE_CACHE_TTL,
+                    response.status_code,
+                    response.content,
+                )
+            return response
+
+        # Nitter cursors chain linearly (page N's HTML holds page N+1's
+        # cursor), so the deepest safe pipeline is one page: as soon as a
+        # page's cursor is extracted, start fetching the next page while the
+        # current one is still being parsed. That overlaps parse CPU and the
+        # rate-limit delay with network latency.
+        pending = asyncio.ensure_future(
+            _fetch_page(f"{self.nitter_url}/{username}")
+        )
 
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Check for error messages
-                error_panel = soup.select_one('.error-panel')
-                if error_panel:
-                    error_text = error_panel.get_text(strip=True)
-                    logger.error(f"Nitter error panel: {error_text}")
-                    if "not found" in error_text.lower():
-                        result.error = f"User @{username} not found"
-                    elif "rate" in error_text.lower():
+        try:
+            while len(result.tweets) < self.max_tweets:
+                page_count += 1
+
+                logger.info(f"")
+                logger.info(f"[PAGE {page_count}] Fetching...")
+
+                if progress_callback:
+                    await progress_callback(
+                        len(result.tweets),
+                        f"Fetching page {page_count}... ({len(result.tweets)} tweets so far)"
+                    )
+
+                try:
+                    response = await pending
+                    pending = None
+                    logger.info(f"[PAGE {page_count}] Response: HTTP {response.status_code}")
+
+                    if response.status_code == 429:
+                        # _fetch_page already retried with backoff
                         result.rate_limited = True
-                        result.error = "Rate limited"
-                    else:
-                        result.error = error_text
-                    break
+                        result.error = "Rate limited by Nitter instance"
+                        logger.warning(f"RATE LIMITED after {len(result.tweets)} tweets on page {page_count}")
+                        break
 
-                # Parse tweets
-                tweet_elements = soup.select('.timeline-item .tweet-body')
-                
-                new_tweets_count = 0
-                skipped_retweets = 0
-                skipped_replies = 0
-                skipped_duplicates = 0
-
-                for elem in tweet_elements:
-                    if len(result.tweets) >= self.max_tweets:
-                        logger.info(f"Reached max_tweets limit ({self.max_tweets})")
+                    if response.status_code == 404:
+                        result.error = f"User @{username} not found"
+                        logger.error(f"User @{username} not found (404)")
                         break
-                    
-                    # Get parent timeline-item for full context
-                    parent = elem.find_parent(class_='timeline-item')
-                    if not parent:
-                        continue
-
-                    tweet = self._parse_tweet(parent, username)
-                    if not tweet:
-                        continue
-                    
-                    if tweet.id in seen_ids:
-                        skipped_duplicates += 1
-                        continue
-                    
-                    # Filter based on preferences
-                    if not include_retweets and tweet.is_retweet:
-                        skipped_retweets += 1
-                        continue
-                    if not include_replies and tweet.is_reply:
-                        skipped_replies += 1
-                        continue
-                    
-                    seen_ids.add(tweet.id)
-                    result.tweets.append(tweet)
-                    new_tweets_count += 1
-
-                logger.info(f"[PAGE {page_count}] +{new_tweets_count} tweets (skipped: {skipped_retweets} RTs, {skipped_replies} replies, {skipped_duplicates} dupes)")
-                logger.info(f"[PAGE {page_count}] TOTAL: {len(result.tweets)}/{self.max_tweets} tweets collected")
-
-                if new_tweets_count == 0:
-                    consecutive_empty += 1
-                    logger.warning(f"[PAGE {page_count}] No new tweets (consecutive empty: {consecutive_empty}/3)")
-                    if consecutive_empty >= 3:
-                        logger.info("[STOP] 3 consecutive empty pages")
+
+                    if response.status_code != 200:
+                        result.error = f"HTTP error: {response.status_code}"
+                        logger.error(f"HTTP error: {response.status_code}")
                         break
-                else:
-                    consecutive_empty = 0
 
-                # Get next page cursor
-                cursor = self._get_next_cursor(soup)
-                if not cursor:
-                    logger.info("[STOP] No more pages available")
-                    break
+                    # Feed raw bytes to the parser; lxml sniffs the charset itself,
+                    # skipping a full decode-to-str pass per page
+                    soup = BeautifulSoup(response.content, SOUP_PARSER)
+
+                    # Check for error messages
+                    error_panel = soup.select_one('.error-panel')
+                    if error_panel:
+                        error_text = error_panel.get_text(strip=True)
+                        logger.error(f"Nitter error panel: {error_text}")
+                        if "not found" in error_text.lower():
+                            result.error = f"User @{username} not found"
+                        elif "rate" in error_text.lower():
+                            result.rate_limited = True
+                            result.error = "Rate limited"
+                        else:
+                            result.error = error_text
+                        break
 
-                # Rate limit delay
-                logger.info(f"[PAGE {page_count}] Waiting {self.delay_seconds}s...")
-                await asyncio.sleep(self.delay_seconds)
-
-            except httpx.TimeoutException:
-                result.error = "Request timed out"
-                logger.error(f"Request timed out on page {page_count}")
-                break
-            except httpx.RequestError as e:
-                result.error = f"Request error: {str(e)}"
-                logger.error(f"Request error on page {page_count}: {e}")
-                break
-            except Exception as e:
-                result.error = f"Unexpected error: {str(e)}"
-                logger.exception(f"Unexpected error on page {page_count}")
-                break
+                    # Kick off the next page before parsing this one
+                    cursor = self._get_next_cursor(soup)
+                    if cursor:
+                        pending = asyncio.ensure_future(_fetch_page(
+                            f"{self.nitter_url}/{username}?cursor={cursor}"
+                        ))
+
+                    # Parse tweets: iterate the timeline items directly and
+                    # check for a tweet body, rather than selecting bodies and
+                    # walking back up the tree per tweet with find_parent
+                    timeline_items = soup.select('.timeline-item')
+
+                    new_tweets_count = 0
+                    skipped_retweets = 0
+                    skipped_replies = 0
+                    skipped_duplicates = 0
+
+                    for parent in timeline_items:
+                        if len(result.tweets) >= self.max_tweets:
+                            logger.info(f"Reached max_tweets limit ({self.max_tweets})")
+                            break
+
+                        if not parent.select_one('.tweet-body'):
+                            continue
+
+                        tweet = self._parse_tweet(parent, username)
+                        if not tweet:
+                            continue
+
+                        if tweet.id in seen_ids:
+                            skipped_duplicates += 1
+                            continue
+
+                        # Filter based on preferences
+                        if not include_retweets and tweet.is_retweet:
+                            skipped_retweets += 1
+                            continue
+                        if not include_replies and tweet.is_reply:
+                            skipped_replies += 1
+                            continue
+
+                        seen_ids.add(tweet.id)
+                        result.tweets.append(tweet)
+                        new_tweets_count += 1
+
+                    logger.info(f"[PAGE {page_count}] +{new_tweets_count} tweets (skipped: {skipped_retweets} RTs, {skipped_replies} replies, {skipped_duplicates} dupes)")
+                    logger.info(f"[PAGE {page_count}] TOTAL: {len(result.tweets)}/{self.max_tweets} tweets collected")
+
+                    if new_tweets_count == 0:
+                        consecutive_empty += 1
+                        logger.warning(f"[PAGE {page_count}] No new tweets (consecutive empty: {consecutive_empty}/3)")
+                        if consecutive_empty >= 3:
+                            logger.info("[STOP] 3 consecutive empty pages")
+                            break
+                    else:
+                        consecutive_empty = 0
+
+                    if not cursor:
+                        logger.info("[STOP] No more pages available")
+                        break
+
+                except httpx.TimeoutException:
+                    result.error = "Request timed out"
+                    logger.error(f"Request timed out on page {page_count}")
+                    break
+                except httpx.RequestError as e:
+                    result.error = f"Request error: {str(e)}"
+                    logger.error(f"Request error on page {page_count}: {e}")
+                    break
+                except Exception as e:
+                    result.error = f"Unexpected error: {str(e)}"
+                    logger.exception(f"Unexpected error on page {page_count}")
+                    break
+        finally:
+            # Stopped early (rate limit, error, caps): drop the in-flight fetch
+            if pending is not None and not pending.done():
+                pending.cancel()
 
         result.total_scraped = len(result.tweets)
         
@@ -383,12 +511,14 @@ def compile_tweets_for_analysis(result: ScrapeResult, max_chars: int = 100000) -
     if not result.tweets:
         return ""
 
-    lines = [
-        f"Tweets from @{result.username}",
-        f"Total tweets: {result.total_scraped}",
-        "=" * 50,
-        ""
-    ]
+    # Stream into one buffer and stop at the budget, instead of materializing
+    # the full corpus only to slice most of it away for large scrapes
+    buf = io.StringIO()
+    buf.write(f"Tweets from @{result.username}\n")
+    buf.write(f"Total tweets: {result.total_scraped}\n")
+    buf.write("=" * 50 + "\n\n")
+    size = buf.tell()
+    truncated = False
 
     for tweet in result.tweets:
         tweet_text = f"[{tweet.timestamp}] {tweet.content}"
@@ -396,18 +526,19 @@ def compile_tweets_for_analysis(result: ScrapeResult, max_chars: int = 100000) -
             tweet_text = "[RT] " + tweet_text
         if tweet.is_reply:
             tweet_text = "[Reply] " + tweet_text
-        
-        lines.append(tweet_text)
-        lines.append(f"  Likes: {tweet.likes} | Retweets: {tweet.retweets} | Replies: {tweet.replies}")
-        lines.append("")
-
-    compiled = "\n".join(lines)
-    
-    # Truncate if too long
-    if len(compiled) > max_chars:
-        logger.info(f"Truncating compiled tweets from {len(compiled)} to {max_chars} chars")
-        compiled = compiled[:max_chars]
-        compiled += "\n\n[... truncated due to length ...]"
-
+        piece = (
+            f"{tweet_text}\n"
+            f"  Likes: {tweet.likes} | Retweets: {tweet.retweets} | Replies: {tweet.replies}\n\n"
+        )
+        if size + len(piece) > max_chars:
+            buf.write("\n\n[... truncated due to length ...]")
+            truncated = True
+            break
+        buf.write(piece)
+        size += len(piece)
+
+    compiled = buf.getvalue()
+    if truncated:
+        logger.info(f"Truncated compiled tweets at the {max_chars} char budget")
     logger.info(f"Compiled {result.total_scraped} tweets into {len(compiled)} characters")
     return compiled
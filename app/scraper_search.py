@@ -7,7 +7,9 @@ Uses the search endpoint with date ranges to bypass timeline pagination limits.
 import asyncio
 import logging
 import os
+import re
 import subprocess
+import time
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from typing import Optional
@@ -19,6 +21,14 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# lxml's C parser builds the tree roughly an order of magnitude faster than
+# the pure-Python html.parser; fall back gracefully when it isn't installed
+try:
+    import lxml  # noqa: F401
+    SOUP_PARSER = "lxml"
+except ImportError:
+    SOUP_PARSER = "html.parser"
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -27,8 +37,39 @@ logging.basicConfig(
 )
 logger = logging.getLogger("search_scraper")
 
-
-@dataclass
+# Extracts the tweet ID from hrefs like /username/status/1234567890
+_STATUS_RE = re.compile(r'/status/(\d+)')
+# Extracts the original author from hrefs like /username/status/...
+_HREF_USER_RE = re.compile(r'^/([^/]+)/')
+
+# Maps stat icon class tokens to the engagement counter they carry; both
+# the bare and icon- prefixed spellings are listed so token lookup matches
+# everything the old substring checks did
+_ICON_STAT_KINDS = {
+    'icon-comment': 'replies',
+    'comment': 'replies',
+    'icon-reply': 'replies',
+    'reply': 'replies',
+    'icon-retweet': 'retweets',
+    'retweet': 'retweets',
+    'icon-quote': 'quotes',
+    'quote': 'quotes',
+    'icon-heart': 'likes',
+    'heart': 'likes',
+    'icon-like': 'likes',
+    'like': 'likes',
+}
+
+# Recently fetched pages, keyed by full URL (which includes the query and
+# cursor). Re-running a scrape for the same user shortly afterwards serves
+# repeat pages from memory instead of burning the Nitter instance's
+# rate-limit budget again. Only clean 200s are stored.
+_PAGE_CACHE: dict[str, tuple[float, int, bytes]] = {}
+_PAGE_CACHE_TTL = float(os.getenv("NITTER_PAGE_CACHE_TTL", "3600"))
+_PAGE_CACHE_MAX = 512
+
+
+@dataclass(slots=True)
 class Tweet:
     """Represents a single tweet."""
     id: str
@@ -45,7 +86,7 @@ class Tweet:
     is_reply: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class ScrapeResult:
     """Result of a scraping operation."""
     username: str
@@ -56,6 +97,35 @@ class ScrapeResult:
     date_ranges_processed: int = 0
 
 
+@dataclass
+class _CachedResponse:
+    """Minimal stand-in for an httpx.Response served from the page cache."""
+    status_code: int
+    content: bytes
+
+
+class _TokenBucket:
+    """Paces page fetches to a sustained rate while allowing a small burst.
+
+    Replaces the fixed inter-page sleep: a quiet instance is fetched at full
+    burst speed, while sustained scraping settles at the configured rate.
+    """
+
+    def __init__(self, rate: float, burst: int = 4):
+        self.rate = rate
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1.0
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self.rate)
+
+
 class NitterSearchScraper:
     """Scrapes tweets using Nitter's search endpoint with date chunking."""
 
@@ -66,6 +136,8 @@ class NitterSearchScraper:
         MULLVAD_CLI = os.getenv("MULLVAD_CLI", "/usr/bin/mullvad")
     VPN_COUNTRIES = ["us", "gb", "de", "nl", "se", "ch", "ca", "fr", "jp", "au", "sg", "br", "it", "es", "pl", "fi", "no", "dk", "at", "be"]
 
+    MAX_429_RETRIES = 5  # Backoff attempts before falling back to a full reset
+
     def __init__(
         self,
         nitter_url: Optional[str] = None,
@@ -75,6 +147,7 @@ class NitterSearchScraper:
         max_restarts: int = 1000,  # Allow many restarts for large scrapes
         docker_compose_path: str = ".",
         nitter_redis_host: Optional[str] = None,  # For Docker mode: direct Redis connection
+        client: Optional[httpx.AsyncClient] = None,
     ):
         self.nitter_url = nitter_url or os.getenv("NITTER_URL", "http://localhost:8080")
         self.delay_seconds = delay_seconds
@@ -83,8 +156,13 @@ class NitterSearchScraper:
         self.max_restarts = max_restarts
         self.docker_compose_path = docker_compose_path
         self.restart_count = 0
-        self.client: Optional[httpx.AsyncClient] = None
-        
+        # An injected client is shared (and kept open) by the caller; we only
+        # create and close our own when none is passed in
+        self.client: Optional[httpx.AsyncClient] = client
+        self._owns_client = client is None
+        # delay_seconds doubles as the sustained pace: 0.5s/page -> 2 pages/s
+        self._pacer = _TokenBucket(rate=1.0 / delay_seconds if delay_seconds > 0 else 2.0)
+
         # Docker mode: when running inside a container, use direct Redis connection
         self.nitter_redis_host = nitter_redis_host or os.getenv("NITTER_REDIS_HOST")
         self.docker_mode = self.nitter_redis_host is not None
@@ -274,9 +352,13 @@ class NitterSearchScraper:
         
         try:
             # Close HTTP client
-            if self.client:
+            # A shared injected client stays open for the rest of the app;
+            # either way we switch to an owned fresh client below so no
+            # stale keep-alive sockets outlive the VPN rotation
+            if self.client and self._owns_client:
                 await self.client.aclose()
-                self.client = None
+            self.client = None
+            self._owns_client = True
             
             # Connect VPN first (if not already connected)
             self._connect_vpn()
@@ -330,18 +412,19 @@ class NitterSearchScraper:
             return False
 
     async def __aenter__(self):
-        logger.info("Opening HTTP client connection")
-        self.client = httpx.AsyncClient(
-            timeout=30.0,
-            follow_redirects=True,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            }
-        )
+        if self.client is None:
+            logger.info("Opening HTTP client connection")
+            self.client = httpx.AsyncClient(
+                timeout=30.0,
+                follow_redirects=True,
+                headers={
+                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+                }
+            )
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.client:
+        if self.client and self._owns_client:
             logger.info("Closing HTTP client connection")
             await self.client.aclose()
 
@@ -353,10 +436,13 @@ class NitterSearchScraper:
         if not text:
             return 0
         try:
-            if 'K' in text:
-                return int(float(text.replace('K', '').replace(',', '')) * 1000)
-            elif 'M' in text:
-                return int(float(text.replace('M', '').replace(',', '')) * 1_000_000)
+            # Suffix (if any) is always the last character; checking it
+            # directly avoids substring scans per stat
+            last = text[-1]
+            if last == 'K':
+                return int(float(text[:-1].replace(',', '')) * 1000)
+            elif last == 'M':
+                return int(float(text[:-1].replace(',', '')) * 1_000_000)
             else:
                 return int(text.replace(',', ''))
         except (ValueError, AttributeError):
@@ -364,20 +450,19 @@ class NitterSearchScraper:
 
     def _parse_tweet(self, tweet_elem) -> Optional[Tweet]:
         """Parse a single tweet element from Nitter HTML."""
-        import re
         try:
             tweet_link = tweet_elem.select_one('.tweet-link')
             if not tweet_link:
                 return None
             
             href = tweet_link.get('href', '')
-            match = re.search(r'/status/(\d+)', href)
+            match = _STATUS_RE.search(href)
             if not match:
                 return None
             tweet_id = match.group(1)
             
             # Extract username from href for URL
-            username_match = re.search(r'^/([^/]+)/', href)
+            username_match = _HREF_USER_RE.search(href)
             tweet_username = username_match.group(1) if username_match else ""
             tweet_url = f"https://twitter.com/{tweet_username}/status/{tweet_id}" if tweet_username else ""
 
@@ -401,25 +486,27 @@ class NitterSearchScraper:
                         images.append(src)
 
             stats = tweet_elem.select('.tweet-stat')
-            replies = retweets = quotes = likes = 0
             
+            counts = {}
             for stat in stats:
                 icon = stat.select_one('.icon-container')
                 value_elem = stat.select_one('.tweet-stat-value, .icon-container + span')
                 if not icon:
                     continue
-                
-                icon_class = ' '.join(icon.get('class', []))
-                value = value_elem.get_text(strip=True) if value_elem else "0"
-                
-                if 'comment' in icon_class or 'reply' in icon_class:
-                    replies = self._parse_stat(value)
-                elif 'retweet' in icon_class:
-                    retweets = self._parse_stat(value)
-                elif 'quote' in icon_class:
-                    quotes = self._parse_stat(value)
-                elif 'heart' in icon_class or 'like' in icon_class:
-                    likes = self._parse_stat(value)
+
+                # Token lookup instead of joining the class list and running
+                # four substring scans per stat
+                for cls in icon.get('class', []):
+                    kind = _ICON_STAT_KINDS.get(cls)
+                    if kind:
+                        value = value_elem.get_text(strip=True) if value_elem else "0"
+                        counts[kind] = self._parse_stat(value)
+                        break
+
+            replies = counts.get('replies', 0)
+            retweets = counts.get('retweets', 0)
+            quotes = counts.get('quotes', 0)
+            likes = counts.get('likes', 0)
 
             retweet_header = tweet_elem.select_one('.retweet-header')
             is_retweet = retweet_header is not None
@@ -473,6 +560,41 @@ class NitterSearchScraper:
         
         return ranges
 
+    async def _fetch_page(self, url: str):
+        """Serve from the page cache when fresh; otherwise wait for a pacer
+        token, fetch, retry 429s with backoff, and cache clean responses.
+
+        Retry-After is honoured when the instance sends it; the caller only
+        falls back to the full VPN/Nitter reset once these retries are spent.
+        """
+        cached = _PAGE_CACHE.get(url)
+        if cached and cached[0] > time.monotonic():
+            logger.info(f"    Page cache hit: {url[:80]}")
+            return _CachedResponse(cached[1], cached[2])
+        response = None
+        for attempt in range(self.MAX_429_RETRIES):
+            await self._pacer.acquire()
+            response = await self.client.get(url)
+            if response.status_code != 429:
+                break
+            try:
+                wait = float(response.headers.get("Retry-After", ""))
+            except ValueError:
+                wait = 1.0
+            wait *= 2 ** attempt
+            logger.warning(f"    HTTP 429, backing off {wait:.1f}s (attempt {attempt + 1}/{self.MAX_429_RETRIES})")
+            await asyncio.sleep(wait)
+        if response.status_code == 200 and b'error-panel' not in response.content:
+            if len(_PAGE_CACHE) >= _PAGE_CACHE_MAX:
+                oldest = min(_PAGE_CACHE, key=lambda k: _PAGE_CACHE[k][0])
+                del _PAGE_CACHE[oldest]
+            _PAGE_CACHE[url] = (
+                time.monotonic() + _PAGE_CACHE_TTL,
+                response.status_code,
+                response.content,
+            )
+        return response
+
     async def _scrape_date_range(
         self,
         username: str,
@@ -484,111 +606,127 @@ class NitterSearchScraper:
     ) -> tuple[list[Tweet], bool, Optional[str]]:
         """Scrape all tweets within a single date range."""
         tweets = []
-        cursor = None
         page = 0
         rate_limited = False
         error = None
 
-        while True:
-            page += 1
-            
-            # Build search query
-            query = f"from:{username} since:{since} until:{until}"
-            url = f"{self.nitter_url}/search?f=tweets&q={quote(query)}"
-            if cursor:
-                url += f"&cursor={cursor}"
+        # Query is constant for the range; only the cursor varies per page
+        query = f"from:{username} since:{since} until:{until}"
+        base_url = f"{self.nitter_url}/search?f=tweets&q={quote(query)}"
 
-            logger.info(f"    [Page {page}] Fetching...")
+        # Nitter cursors chain linearly (page N's HTML holds page N+1's
+        # cursor), so the deepest safe pipeline is one page: as soon as a
+        # page's cursor is extracted, start fetching the next page while the
+        # current one is still being parsed. That overlaps parse CPU and the
+        # pacing delay with network latency.
+        url = base_url
+        pending = asyncio.ensure_future(self._fetch_page(url))
 
-            try:
-                response = await self.client.get(url)
-                
-                # Handle rate limiting - reset everything
-                if response.status_code == 429:
-                    logger.warning(f"    RATE LIMITED on page {page}")
-                    
-                    if await self._reset_for_rate_limit():
-                        logger.info(f"    Resuming from page {page}")
-                        page -= 1
-                        continue
-                    else:
-                        rate_limited = True
-                        error = "Rate limited (reset failed)"
-                        break
-                
-                if response.status_code != 200:
-                    error = f"HTTP {response.status_code}"
-                    logger.error(f"    HTTP error: {response.status_code}")
-                    break
+        try:
+            while True:
+                page += 1
+
+                logger.info(f"    [Page {page}] Fetching...")
+
+                try:
+                    response = await pending
+                    pending = None
+
+                    # Backoff retries exhausted - reset everything
+                    if response.status_code == 429:
+                        logger.warning(f"    RATE LIMITED on page {page}")
 
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Check for rate limit in page content
-                error_panel = soup.select_one('.error-panel')
-                if error_panel:
-                    error_text = error_panel.get_text(strip=True)
-                    if "rate" in error_text.lower():
-                        logger.warning(f"    Rate limit in page")
                         if await self._reset_for_rate_limit():
+                            logger.info(f"    Resuming from page {page}")
                             page -= 1
+                            pending = asyncio.ensure_future(self._fetch_page(url))
                             continue
                         else:
                             rate_limited = True
                             error = "Rate limited (reset failed)"
                             break
-                    else:
-                        error = error_text
-                        logger.error(f"    Nitter error: {error_text}")
+
+                    if response.status_code != 200:
+                        error = f"HTTP {response.status_code}"
+                        logger.error(f"    HTTP error: {response.status_code}")
                         break
 
-                # Parse tweets
-                tweet_elements = soup.select('.timeline-item .tweet-body')
-                new_count = 0
-
-                for elem in tweet_elements:
-                    parent = elem.find_parent(class_='timeline-item')
-                    if not parent:
-                        continue
-
-                    tweet = self._parse_tweet(parent)
-                    if not tweet or tweet.id in seen_ids:
-                        continue
-                    
-                    # Filter: only include tweets BY the target user
-                    if tweet.author and tweet.author != username.lower():
-                        continue
-                    
-                    if not include_retweets and tweet.is_retweet:
-                        continue
-                    if not include_replies and tweet.is_reply:
-                        continue
-                    
-                    seen_ids.add(tweet.id)
-                    tweets.append(tweet)
-                    new_count += 1
-
-                logger.info(f"    [Page {page}] +{new_count} tweets (total this range: {len(tweets)})")
-
-                if new_count == 0:
-                    break
+                    # Raw bytes: lxml sniffs the charset, skipping a decode pass
+                    soup = BeautifulSoup(response.content, SOUP_PARSER)
+
+                    # Check for rate limit in page content
+                    error_panel = soup.select_one('.error-panel')
+                    if error_panel:
+                        error_text = error_panel.get_text(strip=True)
+                        if "rate" in error_text.lower():
+                            logger.warning(f"    Rate limit in page")
+                            if await self._reset_for_rate_limit():
+                                page -= 1
+                                pending = asyncio.ensure_future(self._fetch_page(url))
+                                continue
+                            else:
+                                rate_limited = True
+                                error = "Rate limited (reset failed)"
+                                break
+                        else:
+                            error = error_text
+                            logger.error(f"    Nitter error: {error_text}")
+                            break
 
-                # Get next cursor
-                cursor = self._get_next_cursor(soup)
-                if not cursor:
-                    logger.info(f"    [Page {page}] No more pages")
-                    break
+                    # Kick off the next page before parsing this one
+                    cursor = self._get_next_cursor(soup)
+                    if cursor:
+                        url = f"{base_url}&cursor={cursor}"
+                        pending = asyncio.ensure_future(self._fetch_page(url))
 
-                # Small delay between pages (we reset on rate limit anyway)
-                await asyncio.sleep(self.delay_seconds)
+                    # Parse tweets: iterate timeline items directly instead of
+                    # re-walking up from each .tweet-body with find_parent
+                    timeline_items = soup.select('.timeline-item')
+                    new_count = 0
 
-            except httpx.TimeoutException:
-                error = "Timeout"
-                logger.error(f"    Timeout on page {page}")
-                break
-            except Exception as e:
-                error = str(e)
-                logger.exception(f"    Error on page {page}")
-                break
+                    for parent in timeline_items:
+                        if not parent.select_one('.tweet-body'):
+                            continue
+
+                        tweet = self._parse_tweet(parent)
+                        if not tweet or tweet.id in seen_ids:
+                            continue
+
+                        # Filter: only include tweets BY the target user
+                        if tweet.author and tweet.author != username.lower():
+                            continue
+
+                        if not include_retweets and tweet.is_retweet:
+                            continue
+                        if not include_replies and tweet.is_reply:
+                            continue
+
+                        seen_ids.add(tweet.id)
+                        tweets.append(tweet)
+                        new_count += 1
+
+                    logger.info(f"    [Page {page}] +{new_count} tweets (total this range: {len(tweets)})")
+
+                    if new_count == 0:
+                        break
+
+                    if not cursor:
+                        logger.info(f"    [Page {page}] No more pages")
+                        break
+
+                except httpx.TimeoutException:
+                    error = "Timeout"
+                    logger.error(f"    Timeout on page {page}")
+                    break
+                except Exception as e:
+                    error = str(e)
+                    logger.exception(f"    Error on page {page}")
+                    break
+        finally:
+            # Stopped early (rate limit, error, end of range): drop the
+            # in-flight fetch
+            if pending is not None and not pending.done():
+                pending.cancel()
 
         return tweets, rate_limited, error
 
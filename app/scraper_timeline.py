@@ -8,7 +8,9 @@ Uses pagination to go as far back as possible.
 import asyncio
 import logging
 import os
+import re
 import subprocess
+import time
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional
@@ -20,6 +22,14 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# lxml's C parser builds the tree roughly an order of magnitude faster than
+# the pure-Python html.parser; fall back gracefully when it isn't installed
+try:
+    import lxml  # noqa: F401
+    SOUP_PARSER = "lxml"
+except ImportError:
+    SOUP_PARSER = "html.parser"
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -28,8 +38,39 @@ logging.basicConfig(
 )
 logger = logging.getLogger("timeline_scraper")
 
-
-@dataclass
+# Extracts the tweet ID from hrefs like /username/status/1234567890
+_STATUS_RE = re.compile(r'/status/(\d+)')
+# Extracts the original author from hrefs like /username/status/...
+_HREF_USER_RE = re.compile(r'^/([^/]+)/')
+
+# Maps stat icon class tokens to the engagement counter they carry; both
+# the bare and icon- prefixed spellings are listed so token lookup matches
+# everything the old substring checks did
+_ICON_STAT_KINDS = {
+    'icon-comment': 'replies',
+    'comment': 'replies',
+    'icon-reply': 'replies',
+    'reply': 'replies',
+    'icon-retweet': 'retweets',
+    'retweet': 'retweets',
+    'icon-quote': 'quotes',
+    'quote': 'quotes',
+    'icon-heart': 'likes',
+    'heart': 'likes',
+    'icon-like': 'likes',
+    'like': 'likes',
+}
+
+# Recently fetched pages, keyed by full URL (which includes the cursor).
+# Re-running a scrape for the same user shortly afterwards serves repeat
+# pages from memory instead of burning the Nitter instance's rate-limit
+# budget again. Only clean 200s are stored.
+_PAGE_CACHE: dict[str, tuple[float, int, bytes]] = {}
+_PAGE_CACHE_TTL = float(os.getenv("NITTER_PAGE_CACHE_TTL", "3600"))
+_PAGE_CACHE_MAX = 512
+
+
+@dataclass(slots=True)
 class Tweet:
     """Represents a single tweet/retweet."""
     id: str
@@ -45,7 +86,7 @@ class Tweet:
     is_retweet: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class ScrapeResult:
     """Result of a scraping operation."""
     username: str
@@ -56,6 +97,35 @@ class ScrapeResult:
     pages_processed: int = 0
 
 
+@dataclass
+class _CachedResponse:
+    """Minimal stand-in for an httpx.Response served from the page cache."""
+    status_code: int
+    content: bytes
+
+
+class _TokenBucket:
+    """Paces page fetches to a sustained rate while allowing a small burst.
+
+    Replaces the fixed inter-page sleep: a quiet instance is fetched at full
+    burst speed, while sustained scraping settles at the configured rate.
+    """
+
+    def __init__(self, rate: float, burst: int = 4):
+        self.rate = rate
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1.0
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self.rate)
+
+
 class NitterTimelineScraper:
     """Scrapes retweets from user timeline with rate limit handling."""
 
@@ -66,6 +136,8 @@ class NitterTimelineScraper:
         MULLVAD_CLI = os.getenv("MULLVAD_CLI", "/usr/bin/mullvad")
     VPN_COUNTRIES = ["us", "gb", "de", "nl", "se", "ch", "ca", "fr", "jp", "au", "sg", "br", "it", "es", "pl", "fi", "no", "dk", "at", "be"]
 
+    MAX_429_RETRIES = 5  # Backoff attempts before falling back to a full reset
+
     def __init__(
         self,
         nitter_url: Optional[str] = None,
@@ -73,6 +145,7 @@ class NitterTimelineScraper:
         max_retweets: int = 10000,
         max_restarts: int = 1000,
         docker_compose_path: str = ".",
+        client: Optional[httpx.AsyncClient] = None,
     ):
         self.nitter_url = nitter_url or os.getenv("NITTER_URL", "http://localhost:8080")
         self.delay_seconds = delay_seconds
@@ -80,7 +153,12 @@ class NitterTimelineScraper:
         self.max_restarts = max_restarts
         self.docker_compose_path = docker_compose_path
         self.restart_count = 0
-        self.client: Optional[httpx.AsyncClient] = None
+        # An injected client is shared (and kept open) by the caller; we only
+        # create and close our own when none is passed in
+        self.client: Optional[httpx.AsyncClient] = client
+        self._owns_client = client is None
+        # delay_seconds doubles as the sustained pace: 0.5s/page -> 2 pages/s
+        self._pacer = _TokenBucket(rate=1.0 / delay_seconds if delay_seconds > 0 else 2.0)
         logger.info(f"NitterTimelineScraper initialized: url={self.nitter_url}, max_retweets={max_retweets}")
 
     def _flush_redis(self) -> bool:
@@ -210,9 +288,13 @@ class NitterTimelineScraper:
             return False
         
         try:
-            if self.client:
+            # A shared injected client stays open for the rest of the app;
+            # either way we switch to an owned fresh client below so no
+            # stale keep-alive sockets outlive the VPN rotation
+            if self.client and self._owns_client:
                 await self.client.aclose()
-                self.client = None
+            self.client = None
+            self._owns_client = True
             
             # Connect VPN first (if not already connected)
             self._connect_vpn()
@@ -259,18 +341,19 @@ class NitterTimelineScraper:
             return False
 
     async def __aenter__(self):
-        logger.info("Opening HTTP client connection")
-        self.client = httpx.AsyncClient(
-            timeout=30.0,
-            follow_redirects=True,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            }
-        )
+        if self.client is None:
+            logger.info("Opening HTTP client connection")
+            self.client = httpx.AsyncClient(
+                timeout=30.0,
+                follow_redirects=True,
+                headers={
+                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+                }
+            )
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.client:
+        if self.client and self._owns_client:
             logger.info("Closing HTTP client connection")
             await self.client.aclose()
 
@@ -282,10 +365,13 @@ class NitterTimelineScraper:
         if not text:
             return 0
         try:
-            if 'K' in text:
-                return int(float(text.replace('K', '').replace(',', '')) * 1000)
-            elif 'M' in text:
-                return int(float(text.replace('M', '').replace(',', '')) * 1_000_000)
+            # Suffix (if any) is always the last character; checking it
+            # directly avoids substring scans per stat
+            last = text[-1]
+            if last == 'K':
+                return int(float(text[:-1].replace(',', '')) * 1000)
+            elif last == 'M':
+                return int(float(text[:-1].replace(',', '')) * 1_000_000)
             else:
                 return int(text.replace(',', ''))
         except (ValueError, AttributeError):
@@ -293,7 +379,6 @@ class NitterTimelineScraper:
 
     def _parse_retweet(self, tweet_elem) -> Optional[Tweet]:
         """Parse a retweet element from Nitter HTML."""
-        import re
         try:
             # Check if this is a retweet
             retweet_header = tweet_elem.select_one('.retweet-header')
@@ -305,13 +390,13 @@ class NitterTimelineScraper:
                 return None
             
             href = tweet_link.get('href', '')
-            match = re.search(r'/status/(\d+)', href)
+            match = _STATUS_RE.search(href)
             if not match:
                 return None
             tweet_id = match.group(1)
             
             # Extract username from href for URL
-            username_match = re.search(r'^/([^/]+)/', href)
+            username_match = _HREF_USER_RE.search(href)
             tweet_username = username_match.group(1) if username_match else ""
             tweet_url = f"https://twitter.com/{tweet_username}/status/{tweet_id}" if tweet_username else ""
 
@@ -338,25 +423,27 @@ class NitterTimelineScraper:
                         images.append(src)
 
             stats = tweet_elem.select('.tweet-stat')
-            replies = retweets = quotes = likes = 0
             
+            counts = {}
             for stat in stats:
                 icon = stat.select_one('.icon-container')
                 value_elem = stat.select_one('.tweet-stat-value, .icon-container + span')
                 if not icon:
                     continue
-                
-                icon_class = ' '.join(icon.get('class', []))
-                value = value_elem.get_text(strip=True) if value_elem else "0"
-                
-                if 'comment' in icon_class or 'reply' in icon_class:
-                    replies = self._parse_stat(value)
-                elif 'retweet' in icon_class:
-                    retweets = self._parse_stat(value)
-                elif 'quote' in icon_class:
-                    quotes = self._parse_stat(value)
-                elif 'heart' in icon_class or 'like' in icon_class:
-                    likes = self._parse_stat(value)
+
+                # Token lookup instead of joining the class list and running
+                # four substring scans per stat
+                for cls in icon.get('class', []):
+                    kind = _ICON_STAT_KINDS.get(cls)
+                    if kind:
+                        value = value_elem.get_text(strip=True) if value_elem else "0"
+                        counts[kind] = self._parse_stat(value)
+                        break
+
+            replies = counts.get('replies', 0)
+            retweets = counts.get('retweets', 0)
+            quotes = counts.get('quotes', 0)
+            likes = counts.get('likes', 0)
 
             return Tweet(
                 id=tweet_id,
@@ -413,6 +500,41 @@ class NitterTimelineScraper:
             except ValueError:
                 return None
 
+    async def _fetch_page(self, url: str):
+        """Serve from the page cache when fresh; otherwise wait for a pacer
+        token, fetch, retry 429s with backoff, and cache clean responses.
+
+        Retry-After is honoured when the instance sends it; the caller only
+        falls back to the full VPN/Nitter reset once these retries are spent.
+        """
+        cached = _PAGE_CACHE.get(url)
+        if cached and cached[0] > time.monotonic():
+            logger.info(f"    Page cache hit: {url[:80]}")
+            return _CachedResponse(cached[1], cached[2])
+        response = None
+        for attempt in range(self.MAX_429_RETRIES):
+            await self._pacer.acquire()
+            response = await self.client.get(url)
+            if response.status_code != 429:
+                break
+            try:
+                wait = float(response.headers.get("Retry-After", ""))
+            except ValueError:
+                wait = 1.0
+            wait *= 2 ** attempt
+            logger.warning(f"    HTTP 429, backing off {wait:.1f}s (attempt {attempt + 1}/{self.MAX_429_RETRIES})")
+            await asyncio.sleep(wait)
+        if response.status_code == 200 and b'error-panel' not in response.content:
+            if len(_PAGE_CACHE) >= _PAGE_CACHE_MAX:
+                oldest = min(_PAGE_CACHE, key=lambda k: _PAGE_CACHE[k][0])
+                del _PAGE_CACHE[oldest]
+            _PAGE_CACHE[url] = (
+                time.monotonic() + _PAGE_CACHE_TTL,
+                response.status_code,
+                response.content,
+            )
+        return response
+
     async def scrape_retweets(
         self,
         username: str,
@@ -445,131 +567,145 @@ class NitterTimelineScraper:
 
         result = ScrapeResult(username=username)
         seen_ids = set()
-        cursor = None
         page = 0
         consecutive_empty = 0
 
-        while len(result.tweets) < self.max_retweets:
-            page += 1
-            
-            # Build URL
-            url = f"{self.nitter_url}/{username}"
-            if cursor:
-                url += f"?cursor={cursor}"
+        # Nitter cursors chain linearly (page N's HTML holds page N+1's
+        # cursor), so the deepest safe pipeline is one page: as soon as a
+        # page's cursor is extracted, start fetching the next page while the
+        # current one is still being parsed. That overlaps parse CPU and the
+        # pacing delay with network latency.
+        url = f"{self.nitter_url}/{username}"
+        pending = asyncio.ensure_future(self._fetch_page(url))
 
-            logger.info(f"[Page {page}] Fetching...")
+        try:
+            while len(result.tweets) < self.max_retweets:
+                page += 1
 
-            try:
-                response = await self.client.get(url)
-                
-                # Handle rate limiting
-                if response.status_code == 429:
-                    logger.warning(f"[Page {page}] RATE LIMITED")
-                    
-                    if await self._reset_for_rate_limit():
-                        logger.info(f"    Resuming from page {page}")
-                        page -= 1
-                        continue
-                    else:
-                        result.rate_limited = True
-                        result.error = "Rate limited (reset failed)"
-                        break
-                
-                if response.status_code != 200:
-                    result.error = f"HTTP {response.status_code}"
-                    logger.error(f"[Page {page}] HTTP error: {response.status_code}")
-                    break
+                logger.info(f"[Page {page}] Fetching...")
+
+                try:
+                    response = await pending
+                    pending = None
+
+                    # Backoff retries exhausted - full reset
+                    if response.status_code == 429:
+                        logger.warning(f"[Page {page}] RATE LIMITED")
 
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Check for rate limit in page content
-                error_panel = soup.select_one('.error-panel')
-                if error_panel:
-                    error_text = error_panel.get_text(strip=True)
-                    if "rate" in error_text.lower():
-                        logger.warning(f"[Page {page}] Rate limit in page")
                         if await self._reset_for_rate_limit():
+                            logger.info(f"    Resuming from page {page}")
                             page -= 1
+                            pending = asyncio.ensure_future(self._fetch_page(url))
                             continue
                         else:
                             result.rate_limited = True
                             result.error = "Rate limited (reset failed)"
                             break
-                    else:
-                        result.error = error_text
-                        logger.error(f"[Page {page}] Nitter error: {error_text}")
-                        break
 
-                # Check for "no more items"
-                timeline_end = soup.select_one('.timeline-end')
-                if timeline_end:
-                    logger.info(f"[Page {page}] Reached end of timeline")
-                    break
+                    if response.status_code != 200:
+                        result.error = f"HTTP {response.status_code}"
+                        logger.error(f"[Page {page}] HTTP error: {response.status_code}")
+                        break
 
-                # Parse retweets only
-                timeline_items = soup.select('.timeline-item')
-                new_count = 0
-                page_total = 0
-                passed_date_range = False
-
-                for item in timeline_items:
-                    page_total += 1
-                    tweet = self._parse_retweet(item)
-                    if not tweet:
-                        continue  # Not a retweet
-                    
-                    if tweet.id in seen_ids:
-                        continue
-                    
-                    # Check date filtering
-                    if start_dt or end_dt:
-                        tweet_dt = self._parse_tweet_date(tweet.timestamp)
-                        if tweet_dt:
-                            # Skip tweets that are too new (after end_date)
-                            if end_dt and tweet_dt > end_dt:
+                    # Raw bytes: lxml sniffs the charset, skipping a decode pass
+                    soup = BeautifulSoup(response.content, SOUP_PARSER)
+
+                    # Check for rate limit in page content
+                    error_panel = soup.select_one('.error-panel')
+                    if error_panel:
+                        error_text = error_panel.get_text(strip=True)
+                        if "rate" in error_text.lower():
+                            logger.warning(f"[Page {page}] Rate limit in page")
+                            if await self._reset_for_rate_limit():
+                                page -= 1
+                                pending = asyncio.ensure_future(self._fetch_page(url))
                                 continue
-                            # Stop if tweets are too old (before start_date)
-                            # Timeline is newest first, so once we hit old tweets, all remaining are older
-                            if start_dt and tweet_dt < start_dt:
-                                passed_date_range = True
+                            else:
+                                result.rate_limited = True
+                                result.error = "Rate limited (reset failed)"
                                 break
-                    
-                    seen_ids.add(tweet.id)
-                    result.tweets.append(tweet)
-                    new_count += 1
+                        else:
+                            result.error = error_text
+                            logger.error(f"[Page {page}] Nitter error: {error_text}")
+                            break
 
-                logger.info(f"[Page {page}] +{new_count} retweets (from {page_total} items) | Total: {len(result.tweets)}")
-                
-                # Stop if we've passed the date range
-                if passed_date_range:
-                    logger.info(f"[Page {page}] Reached tweets before start date ({start_date}), stopping")
-                    break
+                    # Check for "no more items"
+                    timeline_end = soup.select_one('.timeline-end')
+                    if timeline_end:
+                        logger.info(f"[Page {page}] Reached end of timeline")
+                        break
+
+                    # Kick off the next page before parsing this one
+                    cursor = self._get_next_cursor(soup)
+                    if cursor:
+                        url = f"{self.nitter_url}/{username}?cursor={cursor}"
+                        pending = asyncio.ensure_future(self._fetch_page(url))
+
+                    # Parse retweets only
+                    timeline_items = soup.select('.timeline-item')
+                    new_count = 0
+                    page_total = 0
+                    passed_date_range = False
+
+                    for item in timeline_items:
+                        page_total += 1
+                        tweet = self._parse_retweet(item)
+                        if not tweet:
+                            continue  # Not a retweet
+
+                        if tweet.id in seen_ids:
+                            continue
 
-                if new_count == 0:
-                    consecutive_empty += 1
-                    if consecutive_empty >= 5:
-                        logger.info(f"[Page {page}] 5 consecutive pages with no new retweets, stopping")
+                        # Check date filtering
+                        if start_dt or end_dt:
+                            tweet_dt = self._parse_tweet_date(tweet.timestamp)
+                            if tweet_dt:
+                                # Skip tweets that are too new (after end_date)
+                                if end_dt and tweet_dt > end_dt:
+                                    continue
+                                # Stop if tweets are too old (before start_date)
+                                # Timeline is newest first, so once we hit old tweets, all remaining are older
+                                if start_dt and tweet_dt < start_dt:
+                                    passed_date_range = True
+                                    break
+
+                        seen_ids.add(tweet.id)
+                        result.tweets.append(tweet)
+                        new_count += 1
+
+                    logger.info(f"[Page {page}] +{new_count} retweets (from {page_total} items) | Total: {len(result.tweets)}")
+
+                    # Stop if we've passed the date range
+                    if passed_date_range:
+                        logger.info(f"[Page {page}] Reached tweets before start date ({start_date}), stopping")
                         break
-                else:
-                    consecutive_empty = 0
 
-                # Get next cursor
-                cursor = self._get_next_cursor(soup)
-                if not cursor:
-                    logger.info(f"[Page {page}] No more pages (no cursor)")
-                    break
+                    if new_count == 0:
+                        consecutive_empty += 1
+                        if consecutive_empty >= 5:
+                            logger.info(f"[Page {page}] 5 consecutive pages with no new retweets, stopping")
+                            break
+                    else:
+                        consecutive_empty = 0
 
-                result.pages_processed = page
-                await asyncio.sleep(self.delay_seconds)
+                    if not cursor:
+                        logger.info(f"[Page {page}] No more pages (no cursor)")
+                        break
 
-            except httpx.TimeoutException:
-                result.error = "Timeout"
-                logger.error(f"[Page {page}] Timeout")
-                break
-            except Exception as e:
-                result.error = str(e)
-                logger.exception(f"[Page {page}] Error")
-                break
+                    result.pages_processed = page
+
+                except httpx.TimeoutException:
+                    result.error = "Timeout"
+                    logger.error(f"[Page {page}] Timeout")
+                    break
+                except Exception as e:
+                    result.error = str(e)
+                    logger.exception(f"[Page {page}] Error")
+                    break
+        finally:
+            # Stopped early (rate limit, error, caps): drop the in-flight fetch
+            if pending is not None and not pending.done():
+                pending.cancel()
 
         result.total_scraped = len(result.tweets)
         result.pages_processed = page
@@ -16,6 +16,7 @@ import logging
 import os
 import subprocess
 import sys
+import time
 from datetime import datetime
 
 from dotenv import load_dotenv
@@ -96,12 +97,34 @@ class Worker:
             logger.warning(f"VPN reconnect error: {e}")
             return False
     
+    LEASE_RENEW_SECONDS = 60  # Keep well inside JobQueue.STALE_JOB_SECONDS
+
+    async def _keep_lease_alive(self, job: Job) -> None:
+        """Periodically refresh the job's in-flight claim while it runs.
+
+        Progress updates renew the lease too, but the milestone updates can
+        be many minutes apart during a long scrape - without this the reaper
+        would requeue the job mid-run and a second worker would execute it
+        concurrently.
+        """
+        while True:
+            await asyncio.sleep(self.LEASE_RENEW_SECONDS)
+            try:
+                await asyncio.to_thread(self.queue.renew_lease, job.id)
+                await asyncio.to_thread(self.queue.worker_heartbeat, self.worker_id, "busy", job.id)
+            except Exception as e:
+                logger.warning(f"Lease renewal failed for {job.id}: {e}")
+
     async def process_job(self, job: Job) -> None:
         """Process a single job - dispatches to platform-specific handler."""
-        if job.platform == Platform.INSTAGRAM:
-            await self.process_instagram_job(job)
-        else:
-            await self.process_twitter_job(job)
+        lease_task = asyncio.create_task(self._keep_lease_alive(job))
+        try:
+            if job.platform == Platform.INSTAGRAM:
+                await self.process_instagram_job(job)
+            else:
+                await self.process_twitter_job(job)
+        finally:
+            lease_task.cancel()
     
     async def process_twitter_job(self, job: Job) -> None:
         """Process a Twitter analysis job."""
@@ -133,7 +156,7 @@ class Worker:
                 async with NitterTimelineScraper(
                     nitter_url=self.nitter_url,
                     delay_seconds=0.5,
-                    max_retweets=5000,
+                    max_retweets=job.max_tweets,
                 ) as scraper:
                     rt_result = await scraper.scrape_retweets(
                         username=job.username,
@@ -157,7 +180,7 @@ class Worker:
                 async with NitterSearchScraper(
                     nitter_url=self.nitter_url,
                     delay_seconds=0.5,
-                    max_tweets=5000,
+                    max_tweets=job.max_tweets,
                 ) as scraper:
                     search_result = await scraper.scrape_user(
                         username=job.username,
@@ -222,9 +245,10 @@ class Worker:
             self._disconnect_vpn()
             
             try:
-                # Run Gemini analysis with indexed tweets
-                analyzer = GeminiAnalyzer(api_key=self.gemini_key)
-                analysis_result = analyzer.analyze(
+                # Run Gemini analysis with indexed tweets. Sharing the queue's
+                # Redis client gives the analyzer a cross-worker response cache.
+                analyzer = GeminiAnalyzer(api_key=self.gemini_key, redis_client=self.queue.redis)
+                analysis_result = await analyzer.analyze_async(
                     indexed_tweets=indexed_tweets,
                     username=job.username,
                     custom_prompt=job.custom_prompt,
@@ -447,12 +471,18 @@ class Worker:
         
         # Register worker
         self.queue.register_worker(self.worker_id, self.nitter_url)
-        
+
+        last_reap = 0.0
         while self.running:
             try:
                 # Send heartbeat
                 self.queue.worker_heartbeat(self.worker_id, "idle")
-                
+
+                # Periodically requeue jobs stranded by crashed workers
+                if time.monotonic() - last_reap > 30:
+                    self.queue.requeue_stale_jobs()
+                    last_reap = time.monotonic()
+
                 # Get next job (blocks for up to 5 seconds)
                 job = self.queue.get_next_job(self.worker_id)
                 